@@ -0,0 +1,83 @@
+import argparse
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import fast_svc
+
+# Build step: turn the pickled scikit-learn SVC into a plain, uncompressed
+# .npz that fast_svc.NumpySVC can memory-map without importing scikit-learn.
+#
+#   python export_model.py --model svc.pkl --output svc.npz
+
+
+def export(svc, output):
+    if len(svc.classes_) < 3:
+        raise ValueError("Only multi-class (one-vs-one) SVC models are supported.")
+
+    arrays = {
+        'kernel': np.array(svc.kernel),
+        'classes': svc.classes_,
+        'intercept': svc.intercept_,
+        'n_features': np.array(svc.n_features_in_),
+    }
+    if svc.kernel in ('linear', 'rbf', 'poly', 'sigmoid'):
+        arrays.update({
+            'support_vectors': np.ascontiguousarray(svc.support_vectors_),
+            'dual_coef': svc.dual_coef_,
+            'n_support': svc.n_support_,
+            'gamma': np.array(svc._gamma),
+            'coef0': np.array(svc.coef0),
+            'degree': np.array(svc.degree),
+        })
+    else:
+        raise ValueError(f"Unsupported kernel: {svc.kernel}")
+
+    np.savez(output, **arrays)
+
+
+def random_symptom_rows(n_rows, n_features, max_symptoms=5, seed=0):
+    # Sparse inputs like the ones /predict sees for unseen symptom sets.
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n_rows, n_features))
+    for row in X:
+        row[rng.choice(n_features, size=rng.integers(1, max_symptoms + 1), replace=False)] = 1
+    return X
+
+
+def verify(svc, output, training_csv, n_random=20000):
+    training = pd.read_csv(training_csv)
+    X_train = training.drop(columns=['prognosis']).to_numpy(dtype=np.float64)
+    model = fast_svc.load(output)
+
+    ok = True
+    for label, X in ((training_csv, X_train),
+                     ("random symptom sets", random_symptom_rows(n_random, X_train.shape[1]))):
+        mismatches = int((svc.predict(X) != model.predict(X)).sum())
+        print(f"Verified {len(X)} rows from {label}: {mismatches} mismatches")
+        ok = ok and mismatches == 0
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export svc.pkl to a NumPy weight file.")
+    parser.add_argument('--model', default='svc.pkl')
+    parser.add_argument('--output', default='svc.npz')
+    parser.add_argument('--training', default='datasets/Training.csv',
+                        help="Rows used to check the export against svc.predict.")
+    parser.add_argument('--random', type=int, default=20000,
+                        help="Random sparse symptom sets also checked against svc.predict.")
+    parser.add_argument('--no-verify', action='store_true')
+    args = parser.parse_args()
+
+    svc = pickle.load(open(args.model, 'rb'))
+    export(svc, args.output)
+    print(f"Wrote {args.output} ({svc.kernel} kernel, {len(svc.classes_)} classes)")
+
+    if not args.no_verify and not verify(svc, args.output, args.training, args.random):
+        raise SystemExit("Exported model does not match svc.predict")
+
+
+if __name__ == '__main__':
+    main()
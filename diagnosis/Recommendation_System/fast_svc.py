@@ -0,0 +1,116 @@
+import zipfile
+
+import numpy as np
+
+# Pure NumPy inference for the exported svc.npz (see export_model.py), so the
+# serving process does not need scikit-learn or the pickled estimator.
+
+
+def load_npz(path, mmap=True):
+    # np.load ignores mmap_mode for .npz archives. The archive is written
+    # uncompressed, so each member can be memory-mapped straight from its
+    # offset in the zip file instead.
+    if not mmap:
+        with np.load(path) as archive:
+            return {name: archive[name] for name in archive.files}
+
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as fh:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(archive.open(info))
+                continue
+            # Skip the local file header to reach the .npy payload.
+            fh.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(fh.read(4), dtype='<u2')
+            fh.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fh)
+            if dtype.hasobject or 0 in shape:
+                fh.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+                arrays[name] = np.lib.format.read_array(fh)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=fh.tell(), shape=shape,
+                                         order='F' if fortran_order else 'C')
+    return arrays
+
+
+class NumpySVC:
+    # Mirrors the parts of sklearn.svm.SVC used by main.py: predict, an "ovr"
+    # decision_function and classes_. Multi-class SVC is one-vs-one, so every
+    # row gets one decision value per class pair and the class with the most
+    # votes wins, with ties going to the lowest class index as in libsvm.
+    probability = False
+
+    def __init__(self, arrays):
+        self.kernel = str(arrays['kernel'])
+        self.classes_ = np.asarray(arrays['classes'])
+        self.intercept_ = np.asarray(arrays['intercept'])
+        self.n_features_in_ = int(arrays['n_features'])
+
+        # The linear kernel also goes through the support vectors: folding
+        # them into coef_ sums in a different order than libsvm, and decision
+        # values that are exactly 0 there come out as +-1e-16, flipping votes.
+        self.support_vectors_ = arrays['support_vectors']
+        self.dual_coef_ = np.asarray(arrays['dual_coef'])
+        self.n_support_ = np.asarray(arrays['n_support'])
+        self.gamma = float(arrays['gamma'])
+        self.coef0 = float(arrays['coef0'])
+        self.degree = int(arrays['degree'])
+        self.pair_coef_ = self._pair_coefficients()
+
+        n_classes = len(self.classes_)
+        first, second = np.triu_indices(n_classes, k=1)
+        self.pair_first_ = np.eye(n_classes)[first]
+        self.pair_second_ = np.eye(n_classes)[second]
+
+    def _pair_coefficients(self):
+        # libsvm stores one row of dual coefficients per "other" class; expand
+        # them into an (n_pairs, n_SV) matrix so all pairs are one matmul.
+        n_classes = len(self.classes_)
+        starts = np.concatenate([[0], np.cumsum(self.n_support_)])
+        pair_coef = np.zeros((n_classes * (n_classes - 1) // 2, self.dual_coef_.shape[1]))
+        pair = 0
+        for i in range(n_classes):
+            for j in range(i + 1, n_classes):
+                pair_coef[pair, starts[i]:starts[i + 1]] = self.dual_coef_[j - 1, starts[i]:starts[i + 1]]
+                pair_coef[pair, starts[j]:starts[j + 1]] = self.dual_coef_[i, starts[j]:starts[j + 1]]
+                pair += 1
+        return pair_coef
+
+    def _kernel(self, X):
+        sv = self.support_vectors_
+        if self.kernel == 'linear':
+            return X @ sv.T
+        if self.kernel == 'rbf':
+            sq_dist = (X * X).sum(axis=1)[:, None] - 2 * X @ sv.T + (sv * sv).sum(axis=1)[None, :]
+            return np.exp(-self.gamma * np.maximum(sq_dist, 0))
+        if self.kernel == 'poly':
+            return (self.gamma * X @ sv.T + self.coef0) ** self.degree
+        if self.kernel == 'sigmoid':
+            return np.tanh(self.gamma * X @ sv.T + self.coef0)
+        raise ValueError(f"Unsupported kernel: {self.kernel}")
+
+    def pairwise_decision(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return self._kernel(X) @ self.pair_coef_.T + self.intercept_
+
+    def decision_function(self, X):
+        # Same transform as sklearn's decision_function_shape="ovr".
+        dec = self.pairwise_decision(X)
+        votes = (dec > 0) @ self.pair_first_ + (dec <= 0) @ self.pair_second_
+        confidences = dec @ (self.pair_first_ - self.pair_second_)
+        return votes + confidences / (3 * (np.abs(confidences) + 1))
+
+    def predict(self, X):
+        dec = self.pairwise_decision(X)
+        votes = (dec > 0) @ self.pair_first_ + (dec <= 0) @ self.pair_second_
+        return self.classes_[np.argmax(votes, axis=1)]
+
+
+def load(path, mmap=True):
+    return NumpySVC(load_npz(path, mmap=mmap))
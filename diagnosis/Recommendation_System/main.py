@@ -3,19 +3,57 @@ import numpy as np
 import pandas as pd
 import pickle
 import ast 
+import hmac
+import os
+import threading
+from types import MappingProxyType
+
+import fast_svc
+from cache import MISSING, LRUCache
+from symptom_resolver import SymptomResolver
 
 app = Flask(__name__)
 
-sym_des = pd.read_csv("datasets/symtoms_df.csv")
-precautions = pd.read_csv("datasets/precautions_df.csv")
-workout = pd.read_csv("datasets/workout_df.csv")
-description = pd.read_csv("datasets/description.csv")
-medications = pd.read_csv('datasets/medications.csv')
-diets = pd.read_csv("datasets/diets.csv")
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 10000))
+DEFAULT_TOP_K = int(os.getenv("TOP_K", 0))
+DEFAULT_MIN_SCORE = os.getenv("TOP_K_MIN_SCORE")
+MODEL_WEIGHTS = os.getenv("MODEL_WEIGHTS", "svc.npz")
+MODEL_PICKLE = os.getenv("MODEL_PICKLE", "svc.pkl")
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 1024))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", 3600))
+SYMPTOM_MATCH_THRESHOLD = float(os.getenv("SYMPTOM_MATCH_THRESHOLD", 0.6))
+# POST /reload is only served when this is set, and then needs
+# "Authorization: Bearer <RELOAD_TOKEN>".
+RELOAD_TOKEN = os.getenv("RELOAD_TOKEN", "")
+
+
+def read_datasets():
+    return (
+        pd.read_csv("datasets/symtoms_df.csv"),
+        pd.read_csv("datasets/precautions_df.csv"),
+        pd.read_csv("datasets/workout_df.csv"),
+        pd.read_csv("datasets/description.csv"),
+        pd.read_csv('datasets/medications.csv'),
+        pd.read_csv("datasets/diets.csv"),
+        pd.read_csv("datasets/Training.csv"),
+        pd.read_csv("datasets/Symptom-severity.csv"),
+    )
+
+
+def load_model():
+    # Prefer the NumPy export (python export_model.py); the pickle needs
+    # scikit-learn. Setting only MODEL_PICKLE serves that pickle, e.g. a
+    # train.py artifact, instead of the default export.
+    pickle_only = "MODEL_PICKLE" in os.environ and "MODEL_WEIGHTS" not in os.environ
+    if not pickle_only and os.path.exists(MODEL_WEIGHTS):
+        return fast_svc.load(MODEL_WEIGHTS)
+    return pickle.load(open(MODEL_PICKLE, 'rb'))
 
-svc = pickle.load(open('svc.pkl', 'rb'))
 
-def helper(dis):
+def scan_disease_info(model, dis):
+    description, precautions, medications, diets, workout = (
+        model.description, model.precautions, model.medications, model.diets, model.workout)
     desc = description[description['Disease'] == dis]['Description'].values
     desc = desc[0] if len(desc) > 0 else ""
     pre = precautions[precautions['Disease'] == dis][['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4']]
@@ -26,21 +64,291 @@ def helper(dis):
     die = die[0].split(', ') if len(die) > 0 else []  
     wrkout = workout[workout['disease'] == dis]['workout'].values
     wrkout = wrkout[0].split(', ') if len(wrkout) > 0 else [] 
-    return desc, pre, med, die, wrkout
+    return desc, tuple(pre), tuple(med), tuple(die), tuple(wrkout)
+
+
+def build_disease_info(model):
+    # Compiled once so that helper() is a dict lookup instead of five DataFrame scans.
+    # Records only hold strings and tuples so they can be shared between requests and
+    # handed to jsonify as-is.
+    diseases = set(diseases_list.values())
+    for frame, column in ((model.description, 'Disease'), (model.precautions, 'Disease'),
+                          (model.medications, 'Disease'), (model.diets, 'Disease'), (model.workout, 'disease')):
+        diseases.update(frame[column].dropna().unique())
+    return MappingProxyType({dis: scan_disease_info(model, dis) for dis in diseases})
+
+
+EMPTY_DISEASE_INFO = ("", (), (), (), ())
+
+
+def helper(model, dis):
+    return model.disease_info.get(dis, EMPTY_DISEASE_INFO)
 
 
 symptoms_dict = {'itching': 0, 'skin_rash': 1, 'nodal_skin_eruptions': 2, 'continuous_sneezing': 3, 'shivering': 4, 'chills': 5, 'joint_pain': 6, 'stomach_pain': 7, 'acidity': 8, 'ulcers_on_tongue': 9, 'muscle_wasting': 10, 'vomiting': 11, 'burning_micturition': 12, 'spotting_ urination': 13, 'fatigue': 14, 'weight_gain': 15, 'anxiety': 16, 'cold_hands_and_feets': 17, 'mood_swings': 18, 'weight_loss': 19, 'restlessness': 20, 'lethargy': 21, 'patches_in_throat': 22, 'irregular_sugar_level': 23, 'cough': 24, 'high_fever': 25, 'sunken_eyes': 26, 'breathlessness': 27, 'sweating': 28, 'dehydration': 29, 'indigestion': 30, 'headache': 31, 'yellowish_skin': 32, 'dark_urine': 33, 'nausea': 34, 'loss_of_appetite': 35, 'pain_behind_the_eyes': 36, 'back_pain': 37, 'constipation': 38, 'abdominal_pain': 39, 'diarrhoea': 40, 'mild_fever': 41, 'yellow_urine': 42, 'yellowing_of_eyes': 43, 'acute_liver_failure': 44, 'fluid_overload': 45, 'swelling_of_stomach': 46, 'swelled_lymph_nodes': 47, 'malaise': 48, 'blurred_and_distorted_vision': 49, 'phlegm': 50, 'throat_irritation': 51, 'redness_of_eyes': 52, 'sinus_pressure': 53, 'runny_nose': 54, 'congestion': 55, 'chest_pain': 56, 'weakness_in_limbs': 57, 'fast_heart_rate': 58, 'pain_during_bowel_movements': 59, 'pain_in_anal_region': 60, 'bloody_stool': 61, 'irritation_in_anus': 62, 'neck_pain': 63, 'dizziness': 64, 'cramps': 65, 'bruising': 66, 'obesity': 67, 'swollen_legs': 68, 'swollen_blood_vessels': 69, 'puffy_face_and_eyes': 70, 'enlarged_thyroid': 71, 'brittle_nails': 72, 'swollen_extremeties': 73, 'excessive_hunger': 74, 'extra_marital_contacts': 75, 'drying_and_tingling_lips': 76, 'slurred_speech': 77, 'knee_pain': 78, 'hip_joint_pain': 79, 'muscle_weakness': 80, 'stiff_neck': 81, 'swelling_joints': 82, 'movement_stiffness': 83, 'spinning_movements': 84, 'loss_of_balance': 85, 'unsteadiness': 86, 'weakness_of_one_body_side': 87, 'loss_of_smell': 88, 'bladder_discomfort': 89, 'foul_smell_of urine': 90, 'continuous_feel_of_urine': 91, 'passage_of_gases': 92, 'internal_itching': 93, 'toxic_look_(typhos)': 94, 'depression': 95, 'irritability': 96, 'muscle_pain': 97, 'altered_sensorium': 98, 'red_spots_over_body': 99, 'belly_pain': 100, 'abnormal_menstruation': 101, 'dischromic _patches': 102, 'watering_from_eyes': 103, 'increased_appetite': 104, 'polyuria': 105, 'family_history': 106, 'mucoid_sputum': 107, 'rusty_sputum': 108, 'lack_of_concentration': 109, 'visual_disturbances': 110, 'receiving_blood_transfusion': 111, 'receiving_unsterile_injections': 112, 'coma': 113, 'stomach_bleeding': 114, 'distention_of_abdomen': 115, 'history_of_alcohol_consumption': 116, 'fluid_overload.1': 117, 'blood_in_sputum': 118, 'prominent_veins_on_calf': 119, 'palpitations': 120, 'painful_walking': 121, 'pus_filled_pimples': 122, 'blackheads': 123, 'scurring': 124, 'skin_peeling': 125, 'silver_like_dusting': 126, 'small_dents_in_nails': 127, 'inflammatory_nails': 128, 'blister': 129, 'red_sore_around_nose': 130, 'yellow_crust_ooze': 131}
 diseases_list = {15: 'Fungal infection', 4: 'Allergy', 16: 'GERD', 9: 'Chronic cholestasis', 14: 'Drug Reaction', 33: 'Peptic ulcer diseae', 1: 'AIDS', 12: 'Diabetes ', 17: 'Gastroenteritis', 6: 'Bronchial Asthma', 23: 'Hypertension ', 30: 'Migraine', 7: 'Cervical spondylosis', 32: 'Paralysis (brain hemorrhage)', 28: 'Jaundice', 29: 'Malaria', 8: 'Chicken pox', 11: 'Dengue', 37: 'Typhoid', 40: 'hepatitis A', 19: 'Hepatitis B', 20: 'Hepatitis C', 21: 'Hepatitis D', 22: 'Hepatitis E', 3: 'Alcoholic hepatitis', 36: 'Tuberculosis', 10: 'Common Cold', 34: 'Pneumonia', 13: 'Dimorphic hemmorhoids(piles)', 18: 'Heart attack', 39: 'Varicose veins', 26: 'Hypothyroidism', 24: 'Hyperthyroidism', 25: 'Hypoglycemia', 31: 'Osteoarthristis', 5: 'Arthritis', 0: '(vertigo) Paroymsal  Positional Vertigo', 2: 'Acne', 38: 'Urinary tract infection', 35: 'Psoriasis', 27: 'Impetigo'}
 
 
-def get_predicted_value(patient_symptoms):
+symptom_resolver = SymptomResolver(symptoms_dict, threshold=SYMPTOM_MATCH_THRESHOLD)
+
+
+def symptom_keys(input_matrix):
+    # 132 symptoms pack into a 17-byte bitset per row.
+    return [key.tobytes() for key in np.packbits(np.atleast_2d(input_matrix) != 0, axis=1)]
+
+
+def build_symptom_lookup(training, svc):
+    # Every distinct symptom combination in Training.csv (304 of 4920 rows),
+    # labelled by the classifier itself so a hit answers exactly what svc would.
+    rows = np.unique(training[list(symptoms_dict)].to_numpy() != 0, axis=0)
+    labels = svc.predict(rows.astype(np.float64))
+    return MappingProxyType(dict(zip(symptom_keys(rows), (diseases_list[label] for label in labels))))
+
+
+def build_severity_weights(severity):
+    # Symptom-severity.csv spells a few names differently from symptoms_dict
+    # ('spotting_urination', 'foul_smell_ofurine') and lists fluid_overload
+    # twice, once per Training.csv column, so match on the name without
+    # separators and hand out duplicates in column order.
+    def squash(name):
+        return ''.join(ch for ch in name.split('.')[0].lower() if ch.isalnum())
+
+    slots = {}
+    for symptom, index in symptoms_dict.items():
+        slots.setdefault(squash(symptom), []).append(index)
+
+    weights = np.zeros(len(symptoms_dict))
+    for name, weight in zip(severity['Symptom'], severity['weight']):
+        indices = slots.get(squash(str(name)))
+        if indices:
+            weights[indices.pop(0)] = weight
+    return weights
+
+
+lookup_stats = {"hits": 0, "misses": 0}
+lookup_stats_lock = threading.Lock()
+
+
+def build_question_index(training):
+    # Distinct (symptom bitset, prognosis) pairs of Training.csv with their
+    # row counts, so next-question scoring works on ~300 rows instead of 4920.
+    diseases, labels = np.unique(training['prognosis'].to_numpy(), return_inverse=True)
+    rows = training[list(symptoms_dict)].to_numpy() != 0
+    unique, counts = np.unique(np.column_stack([rows, labels]), axis=0, return_counts=True)
+    return unique[:, :-1].astype(bool), unique[:, -1], counts, diseases
+
+
+class ModelState:
+    # Everything built from the CSVs and the model. reload_data() builds a
+    # complete new one and swaps it in with a single assignment; requests read
+    # `state` once, so they never pair a new svc with old lookup tables.
+    def __init__(self):
+        (self.sym_des, self.precautions, self.workout, self.description, self.medications,
+         self.diets, self.training, self.severity) = read_datasets()
+        self.svc = load_model()
+        self.disease_info = build_disease_info(self)
+        self.symptom_lookup = build_symptom_lookup(self.training, self.svc)
+        self.question_index = build_question_index(self.training)
+        self.severity_weights = build_severity_weights(self.severity)
+
+
+state = ModelState()
+
+
+def entropy(counts):
+    # Row-wise entropy in bits of an (n, n_diseases) count matrix.
+    totals = counts.sum(axis=1, keepdims=True)
+    p = np.divide(counts, totals, out=np.zeros_like(counts, dtype=np.float64), where=totals > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return -np.nansum(p * np.log2(p), axis=1)
+
+
+def rank_next_questions(model, present, absent, limit):
+    rows, labels, counts, diseases = model.question_index
+    present_idx = [symptoms_dict[s] for s in present]
+    absent_idx = [symptoms_dict[s] for s in absent]
+
+    match = rows[:, present_idx].sum(axis=1) - rows[:, absent_idx].sum(axis=1)
+    exact = (match == len(present_idx)) & ~rows[:, absent_idx].any(axis=1)
+    # Nothing in Training.csv has exactly this profile: keep the closest rows.
+    candidates = exact if exact.any() else match == match.max()
+
+    weights = counts[candidates]
+    disease_counts = np.zeros((1, len(diseases)))
+    np.add.at(disease_counts[0], labels[candidates], weights)
+    label_onehot = np.eye(len(diseases))[labels[candidates]] * weights[:, None]
+
+    # counts of each disease among candidate rows with each symptom present / absent
+    with_symptom = rows[candidates].T.astype(np.float64) @ label_onehot
+    without_symptom = disease_counts - with_symptom
+    total = weights.sum()
+    p_present = with_symptom.sum(axis=1) / total
+    gain = entropy(disease_counts)[0] - (p_present * entropy(with_symptom) + (1 - p_present) * entropy(without_symptom))
+
+    gain[present_idx + absent_idx] = -np.inf
+    order = np.argsort(-gain, kind='stable')[:limit]
+    names = list(symptoms_dict)
+    questions = [
+        {"symptom": names[i], "information_gain": round(float(gain[i]), 4), "p_present": round(float(p_present[i]), 4)}
+        for i in order if gain[i] > 0
+    ]
+    probabilities = disease_counts[0] / total
+    candidate_diseases = [
+        {"disease": diseases[i], "probability": round(float(probabilities[i]), 4)}
+        for i in np.argsort(-probabilities, kind='stable') if probabilities[i] > 0
+    ]
+    return questions, candidate_diseases, bool(exact.any())
+
+
+prediction_cache = LRUCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+reload_lock = threading.Lock()
+
+
+def reload_data():
+    global state
+    with reload_lock:
+        state = ModelState()
+        prediction_cache.clear()
+
+
+def count_lookups(hits, misses):
+    with lookup_stats_lock:
+        lookup_stats["hits"] += hits
+        lookup_stats["misses"] += misses
+
+
+def parse_symptoms(symptoms):
+    if isinstance(symptoms, str):
+        symptoms = symptoms.split(',')
+    user_symptoms = [s.strip() for s in symptoms]
+    return [symptom.strip("[]' ") for symptom in user_symptoms]
+
+
+def is_symptom_row(symptoms):
+    return isinstance(symptoms, str) or (
+        isinstance(symptoms, list) and all(isinstance(symptom, str) for symptom in symptoms))
+
+
+def get_predicted_value(model, patient_symptoms):
     input_vector = np.zeros(len(symptoms_dict))
     for item in patient_symptoms:
         if item in symptoms_dict:
             input_vector[symptoms_dict[item]] = 1
         else:
             raise KeyError(f"Unrecognized symptom: {item}")
-    return diseases_list[svc.predict([input_vector])[0]]
+    predicted_disease = model.symptom_lookup.get(symptom_keys(input_vector)[0])
+    count_lookups(predicted_disease is not None, predicted_disease is None)
+    if predicted_disease is not None:
+        return predicted_disease
+    return diseases_list[model.svc.predict([input_vector])[0]]
+
+
+def build_input_matrix(batch):
+    # Rows with an unknown symptom are reported in `errors` and left all-zero.
+    rows, cols, errors = [], [], {}
+    for row, patient_symptoms in enumerate(batch):
+        if not patient_symptoms:
+            errors[row] = "No symptoms provided or misspelled symptoms. Please check your input."
+            continue
+        indices = []
+        for item in patient_symptoms:
+            if item not in symptoms_dict:
+                errors[row] = f"Unrecognized symptom: {item}"
+                break
+            indices.append(symptoms_dict[item])
+        else:
+            rows.extend([row] * len(indices))
+            cols.extend(indices)
+
+    input_matrix = np.zeros((len(batch), len(symptoms_dict)))
+    input_matrix[rows, cols] = 1
+    return input_matrix, errors
+
+
+def score_matrix(model, input_matrix):
+    # One vectorized pass; columns line up with svc.classes_. Returns the raw
+    # scores used for ranking and the [0, 1] scores reported to clients.
+    # SVC only has usable probabilities when trained with probability=True;
+    # the other train.py candidates always do.
+    svc = model.svc
+    if getattr(svc, 'probability', hasattr(svc, 'predict_proba')):
+        scores = svc.predict_proba(input_matrix)
+        return scores, scores
+    # The ovr decision function of a multi-class SVC is the one-vs-one vote
+    # count plus a small tie-breaking confidence, so scale it to the fraction
+    # of pairwise contests each disease won.
+    scores = svc.decision_function(input_matrix)
+    return scores, np.clip(scores / (len(svc.classes_) - 1), 0, 1)
+
+
+def get_top_candidates(model, input_matrix, top_k, min_score=None):
+    raw_scores, scores = score_matrix(model, input_matrix)
+    top_k = min(top_k, scores.shape[1])
+    top = np.argsort(-raw_scores, axis=1, kind='stable')[:, :top_k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+
+    candidates = []
+    for classes, row_scores in zip(model.svc.classes_[top], top_scores):
+        candidates.append([
+            {"disease": diseases_list[label], "score": round(float(score), 4)}
+            for label, score in zip(classes, row_scores)
+            if min_score is None or score >= min_score
+        ])
+    return candidates
+
+
+def get_severities(model, input_matrix):
+    weighted = input_matrix * model.severity_weights
+    return [
+        {"score": float(score), "max": float(peak)}
+        for score, peak in zip(weighted.sum(axis=1), weighted.max(axis=1, initial=0))
+    ]
+
+
+def get_predicted_values(model, batch, top_k=0, min_score=None, severity=False):
+    input_matrix, errors = build_input_matrix(batch)
+    valid = [row for row in range(len(batch)) if row not in errors]
+
+    predictions = [None] * len(batch)
+    candidates = [None] * len(batch)
+    severities = get_severities(model, input_matrix) if severity else [None] * len(batch)
+    if valid:
+        valid_matrix = input_matrix[valid]
+        misses = []
+        for row, key in zip(valid, symptom_keys(valid_matrix)):
+            predictions[row] = model.symptom_lookup.get(key)
+            if predictions[row] is None:
+                misses.append(row)
+        count_lookups(len(valid) - len(misses), len(misses))
+        if misses:
+            for row, label in zip(misses, model.svc.predict(input_matrix[misses])):
+                predictions[row] = diseases_list[label]
+        if top_k:
+            for row, row_candidates in zip(valid, get_top_candidates(model, valid_matrix, top_k, min_score)):
+                candidates[row] = row_candidates
+    return predictions, candidates, severities, errors
+
+
+def parse_top_k(data):
+    # Raises ValueError for malformed values so routes can answer 400.
+    top_k = int(data.get('top_k', DEFAULT_TOP_K) or 0)
+    min_score = data.get('min_score', DEFAULT_MIN_SCORE)
+    min_score = None if min_score in (None, '') else float(min_score)
+    if top_k < 0:
+        raise ValueError("top_k must be a non-negative integer.")
+    return top_k, min_score
+
+
+def disease_response(model, predicted_disease):
+    dis_des, pre, med, die, wrkout = helper(model, predicted_disease)
+    return {
+        "predicted_disease": predicted_disease,
+        "description": dis_des,
+        "precautions": pre,
+        "medications": med,
+        "diets": die,
+        "workout": wrkout
+    }
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -52,28 +360,146 @@ def predict():
             "error": "No symptoms provided or misspelled symptoms. Please check your input."
         }), 400
 
-    user_symptoms = [s.strip() for s in symptoms.split(',')]
-    user_symptoms = [symptom.strip("[]' ") for symptom in user_symptoms]
+    user_symptoms, resolutions = symptom_resolver.resolve_all(parse_symptoms(symptoms))
 
     try:
-        predicted_disease = get_predicted_value(user_symptoms)
-        dis_des, pre, med, die, wrkout = helper(predicted_disease)
+        top_k, min_score = parse_top_k(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid top_k/min_score: {e}"}), 400
+
+    with_severity = bool(data.get('severity', False))
+    cache_key = (tuple(sorted(set(user_symptoms))), top_k, min_score, with_severity)
+    generation = prediction_cache.generation
+    model = state
+    response_data = prediction_cache.get(cache_key)
+    if response_data is not MISSING:
+        return jsonify({**response_data, "resolved_symptoms": resolutions}), 200
+
+    if top_k or with_severity:
+        predictions, candidates, severities, errors = get_predicted_values(
+            model, [user_symptoms], top_k, min_score, with_severity)
+        if errors:
+            return jsonify({"error": errors[0], "resolved_symptoms": resolutions}), 400
+        response_data = disease_response(model, predictions[0])
+        if top_k:
+            response_data["candidates"] = candidates[0]
+        if with_severity:
+            response_data["severity"] = severities[0]
+        prediction_cache.set(cache_key, response_data, generation)
+        return jsonify({**response_data, "resolved_symptoms": resolutions}), 200
 
-        response_data = {
-            "predicted_disease": predicted_disease,
-            "description": dis_des,
-            "precautions": pre,
-            "medications": med,
-            "diets": die,
-            "workout": wrkout
-        }
+    try:
+        predicted_disease = get_predicted_value(model, user_symptoms)
+        response_data = disease_response(model, predicted_disease)
+        prediction_cache.set(cache_key, response_data, generation)
 
-        return jsonify(response_data), 200
+        return jsonify({**response_data, "resolved_symptoms": resolutions}), 200
 
     except KeyError as e:
         return jsonify({
-            "error": str(e)
+            "error": str(e),
+            "resolved_symptoms": resolutions
         }), 400
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    data = request.json
+    batch = data.get('symptoms', [])
+
+    if not isinstance(batch, list) or not batch:
+        return jsonify({
+            "error": "Provide 'symptoms' as a non-empty list of symptom lists or comma-separated strings."
+        }), 400
+
+    if len(batch) > MAX_BATCH_SIZE:
+        return jsonify({
+            "error": f"Batch too large: {len(batch)} rows, limit is {MAX_BATCH_SIZE}."
+        }), 413
+
+    try:
+        top_k, min_score = parse_top_k(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid top_k/min_score: {e}"}), 400
+
+    rank_by_severity = bool(data.get('rank_by_severity', False))
+    with_severity = rank_by_severity or bool(data.get('severity', False))
+
+    # Malformed rows are predicted as empty and reported with their own error.
+    invalid_rows = {row: "Row must be a list of symptom strings or a comma-separated string."
+                    for row, symptoms in enumerate(batch) if symptoms and not is_symptom_row(symptoms)}
+    resolved = [symptom_resolver.resolve_all(parse_symptoms(symptoms) if symptoms and row not in invalid_rows else [])
+                for row, symptoms in enumerate(batch)]
+    batch = [symptoms for symptoms, _ in resolved]
+    model = state
+    predictions, candidates, severities, errors = get_predicted_values(model, batch, top_k, min_score, with_severity)
+    errors.update(invalid_rows)
+
+    results = []
+    for row, predicted_disease in enumerate(predictions):
+        if row in errors:
+            results.append({"row": row, "error": errors[row], "resolved_symptoms": resolved[row][1]})
+            continue
+        result = disease_response(model, predicted_disease)
+        if top_k:
+            result["candidates"] = candidates[row]
+        if with_severity:
+            result["severity"] = severities[row]
+        result["row"] = row
+        result["resolved_symptoms"] = resolved[row][1]
+        results.append(result)
+
+    if rank_by_severity:
+        # Most urgent first; rows that failed go last, input order breaks ties.
+        results.sort(key=lambda result: -result["severity"]["score"] if "severity" in result else float('inf'))
+
+    return jsonify({"results": results}), 200
+
+@app.route('/next_question', methods=['POST'])
+def next_question():
+    data = request.json
+    symptoms = data.get('symptoms', '')
+    absent = data.get('absent', '')
+
+    present, resolutions = symptom_resolver.resolve_all(parse_symptoms(symptoms) if symptoms else [])
+    absent, absent_resolutions = symptom_resolver.resolve_all(parse_symptoms(absent) if absent else [])
+    unknown = [item["input"] for item in resolutions + absent_resolutions if item["symptom"] is None]
+    if unknown:
+        return jsonify({
+            "error": f"Unrecognized symptom: {unknown[0]}",
+            "resolved_symptoms": resolutions + absent_resolutions
+        }), 400
+
+    try:
+        limit = int(data.get('limit', 3))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be an integer."}), 400
+
+    questions, candidates, exact = rank_next_questions(state, present, absent, limit)
+    return jsonify({
+        "questions": questions,
+        "candidates": candidates,
+        "exact_match": exact,
+        "resolved_symptoms": resolutions + absent_resolutions
+    }), 200
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    with lookup_stats_lock:
+        lookups = dict(lookup_stats)
+    total = lookups["hits"] + lookups["misses"]
+    lookups["size"] = len(state.symptom_lookup)
+    lookups["hit_rate"] = round(lookups["hits"] / total, 4) if total else 0.0
+    return jsonify({"symptom_lookup": lookups, "prediction_cache": prediction_cache.stats()}), 200
+
+@app.route('/reload', methods=['POST'])
+def reload():
+    if not RELOAD_TOKEN:
+        return jsonify({"error": "Not found."}), 404
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(token.encode(), RELOAD_TOKEN.encode()):
+        return jsonify({"error": "Unauthorized."}), 401
+    reload_data()
+    return jsonify({"reloaded": True, "cache_generation": prediction_cache.generation}), 200
+
 if __name__ == '__main__':
     app.run(debug=True)
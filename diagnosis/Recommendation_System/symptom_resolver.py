@@ -0,0 +1,167 @@
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import chain
+
+# Free-text variants mapped to keys of main.symptoms_dict. Keys are matched
+# after normalize(), so spacing, case and punctuation do not matter here.
+SYNONYMS = {
+    "fever": "high_fever",
+    "high temperature": "high_fever",
+    "low grade fever": "mild_fever",
+    "itchy": "itching",
+    "itchiness": "itching",
+    "rash": "skin_rash",
+    "rashes": "skin_rash",
+    "sneezing": "continuous_sneezing",
+    "shivers": "shivering",
+    "tired": "fatigue",
+    "tiredness": "fatigue",
+    "exhaustion": "fatigue",
+    "throwing up": "vomiting",
+    "vomit": "vomiting",
+    "nauseous": "nausea",
+    "loose motion": "diarrhoea",
+    "loose motions": "diarrhoea",
+    "diarrhea": "diarrhoea",
+    "stomach ache": "stomach_pain",
+    "stomachache": "stomach_pain",
+    "tummy ache": "belly_pain",
+    "head ache": "headache",
+    "migraine": "headache",
+    "backache": "back_pain",
+    "back ache": "back_pain",
+    "joint ache": "joint_pain",
+    "chest ache": "chest_pain",
+    "shortness of breath": "breathlessness",
+    "short of breath": "breathlessness",
+    "difficulty breathing": "breathlessness",
+    "dizzy": "dizziness",
+    "vertigo": "spinning_movements",
+    "sweat": "sweating",
+    "anxious": "anxiety",
+    "depressed": "depression",
+    "no appetite": "loss_of_appetite",
+    "poor appetite": "loss_of_appetite",
+    "frequent urination": "polyuria",
+    "painful urination": "burning_micturition",
+    "burning urination": "burning_micturition",
+    "blood in stool": "bloody_stool",
+    "blood in urine": "spotting_ urination",
+    "yellow skin": "yellowish_skin",
+    "yellow eyes": "yellowing_of_eyes",
+    "red eyes": "redness_of_eyes",
+    "watery eyes": "watering_from_eyes",
+    "sore throat": "throat_irritation",
+    "stuffy nose": "congestion",
+    "blocked nose": "congestion",
+    "nasal congestion": "congestion",
+    "cold hands": "cold_hands_and_feets",
+    "cold feet": "cold_hands_and_feets",
+    "swollen lymph nodes": "swelled_lymph_nodes",
+    "blurred vision": "blurred_and_distorted_vision",
+    "blurry vision": "blurred_and_distorted_vision",
+    "palpitation": "palpitations",
+    "racing heart": "fast_heart_rate",
+    "heart racing": "fast_heart_rate",
+    "gas": "passage_of_gases",
+    "flatulence": "passage_of_gases",
+    "bloating": "distention_of_abdomen",
+    "pimples": "pus_filled_pimples",
+    "acne": "pus_filled_pimples",
+    "mucus": "phlegm",
+    "sputum": "mucoid_sputum",
+    "coughing blood": "blood_in_sputum",
+    "weight gain": "weight_gain",
+    "overweight": "obesity",
+    "hunger": "excessive_hunger",
+    "thirst": "dehydration",
+    "heartburn": "acidity",
+    "mouth ulcers": "ulcers_on_tongue",
+    "swollen legs": "swollen_legs",
+    "swollen joints": "swelling_joints",
+    "confusion": "altered_sensorium",
+}
+
+# Inputs shorter than this many characters must score at least
+# SHORT_INPUT_THRESHOLD to be fuzzy-matched.
+SHORT_INPUT_LENGTH = 6
+SHORT_INPUT_THRESHOLD = 0.85
+
+
+def normalize(text):
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymptomResolver:
+    # Resolves user input to symptoms_dict keys in four steps: exact key,
+    # normalized key, synonym table, then a character-trigram index scored by
+    # Dice similarity. The vocabulary is a few hundred phrases, so the index
+    # and a memo of recent inputs keep resolution in the microsecond range.
+
+    def __init__(self, symptoms_dict, synonyms=SYNONYMS, threshold=0.6, memo_size=4096):
+        self.symptoms = symptoms_dict
+        self.threshold = threshold
+        self.phrases = {}
+        for symptom in symptoms_dict:
+            self.phrases.setdefault(normalize(symptom), symptom)
+        self.canonical = dict(self.phrases)
+        for phrase, symptom in synonyms.items():
+            if symptom not in symptoms_dict:
+                raise ValueError(f"Synonym {phrase!r} maps to unknown symptom {symptom!r}")
+            self.phrases.setdefault(normalize(phrase), symptom)
+
+        self.entries = list(self.phrases.items())
+        self.entry_sizes = []
+        self.index = defaultdict(list)
+        for entry_id, (phrase, _) in enumerate(self.entries):
+            grams = trigrams(phrase)
+            self.entry_sizes.append(len(grams))
+            for gram in grams:
+                self.index[gram].append(entry_id)
+
+        self.resolve = lru_cache(maxsize=memo_size)(self._resolve)
+
+    def _resolve(self, term):
+        # Returns (symptom or None, match type, score).
+        if term in self.symptoms:
+            return term, "exact", 1.0
+        phrase = normalize(term)
+        if phrase in self.canonical:
+            return self.canonical[phrase], "normalized", 1.0
+        if phrase in self.phrases:
+            return self.phrases[phrase], "synonym", 1.0
+        if not phrase:
+            return None, None, 0.0
+
+        grams = trigrams(phrase)
+        shared = Counter(chain.from_iterable(self.index.get(gram, ()) for gram in grams))
+        best_id, best_score = None, 0.0
+        for entry_id, count in shared.items():
+            score = 2 * count / (len(grams) + self.entry_sizes[entry_id])
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        # Short words share too many trigrams by chance ("cold" vs
+        # "cold hands and feets"), so they need a closer match, and an input
+        # whose words are only part of the matched phrase is not a match.
+        threshold = max(self.threshold, SHORT_INPUT_THRESHOLD) if len(phrase) < SHORT_INPUT_LENGTH else self.threshold
+        if best_id is None or best_score < threshold:
+            return None, None, round(best_score, 3)
+        if set(phrase.split()) < set(self.entries[best_id][0].split()):
+            return None, None, round(best_score, 3)
+        return self.entries[best_id][1], "fuzzy", round(best_score, 3)
+
+    def resolve_all(self, terms):
+        # Unresolved terms are passed through unchanged so callers keep their
+        # existing "Unrecognized symptom" handling.
+        symptoms, resolutions = [], []
+        for term in terms:
+            symptom, match, score = self.resolve(term)
+            symptoms.append(symptom if symptom is not None else term)
+            resolutions.append({"input": term, "symptom": symptom, "match": match, "score": score})
+        return symptoms, resolutions
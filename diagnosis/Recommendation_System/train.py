@@ -0,0 +1,170 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.preprocessing import LabelEncoder
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+import export_model
+
+# Reproducible replacement for the training cells of Recommendation.ipynb.
+# Trains the candidate models on the same split as the notebook, reports
+# accuracy, latency and size for each, and writes a versioned artifact for
+# the fastest model that meets --min-accuracy.
+#
+#   python train.py --models svc,logreg,nb,tree --min-accuracy 0.99
+
+CANDIDATES = {
+    'svc': lambda seed: SVC(kernel='linear'),
+    'logreg': lambda seed: LogisticRegression(max_iter=1000, random_state=seed),
+    'nb': lambda seed: MultinomialNB(),
+    'tree': lambda seed: DecisionTreeClassifier(random_state=seed),
+}
+
+
+def load_training(path):
+    dataset = pd.read_csv(path)
+    X = dataset.drop('prognosis', axis=1).to_numpy(dtype=np.float64)
+    # LabelEncoder sorts the names, which is the numbering main.diseases_list uses.
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(dataset['prognosis'])
+    return X, y, encoder
+
+
+def time_single_rows(model, X, rows):
+    timings = []
+    for row in X[:rows]:
+        start = time.perf_counter()
+        model.predict(row[None, :])
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1e6
+
+
+def time_batch(model, X, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def evaluate(name, model, X_train, X_test, y_train, y_test, args):
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    single = time_single_rows(model, X_test, args.latency_rows)
+    batch_ms = time_batch(model, X_test, args.repeat)
+    return {
+        "model": name,
+        "accuracy": round(float(accuracy_score(y_test, model.predict(X_test))), 4),
+        "fit_seconds": round(fit_seconds, 3),
+        "single_row_us_p50": round(float(np.percentile(single, 50)), 1),
+        "single_row_us_p95": round(float(np.percentile(single, 95)), 1),
+        "batch_rows": len(X_test),
+        "batch_ms": round(batch_ms, 3),
+        "batch_us_per_row": round(batch_ms * 1e3 / len(X_test), 2),
+        "model_bytes": len(pickle.dumps(model)),
+    }
+
+
+def select(results, min_accuracy):
+    eligible = [result for result in results if result["accuracy"] >= min_accuracy]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda result: (result["single_row_us_p50"], -result["accuracy"]))
+
+
+def print_report(results, chosen):
+    columns = ["model", "accuracy", "single_row_us_p50", "single_row_us_p95", "batch_us_per_row", "model_bytes"]
+    print("  ".join(f"{column:>18}" for column in columns))
+    for result in results:
+        marker = " *" if chosen is result else ""
+        print("  ".join(f"{result[column]:>18}" for column in columns) + marker)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and benchmark symptom classifiers.")
+    parser.add_argument('--data', default='datasets/Training.csv')
+    parser.add_argument('--models', default=','.join(CANDIDATES),
+                        help=f"Comma-separated subset of: {', '.join(CANDIDATES)}")
+    parser.add_argument('--test-size', type=float, default=0.3)
+    parser.add_argument('--random-state', type=int, default=20)
+    parser.add_argument('--min-accuracy', type=float, default=0.99)
+    parser.add_argument('--latency-rows', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output-dir', default='artifacts')
+    parser.add_argument('--export-npz', action='store_true',
+                        help="Also export the chosen model for fast_svc (SVC models only).")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.models.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CANDIDATES]
+    if unknown:
+        parser.error(f"Unknown model(s): {', '.join(unknown)}")
+
+    X, y, encoder = load_training(args.data)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=args.test_size,
+                                                        random_state=args.random_state)
+
+    models, results = {}, []
+    for name in names:
+        models[name] = CANDIDATES[name](args.random_state)
+        results.append(evaluate(name, models[name], X_train, X_test, y_train, y_test, args))
+
+    chosen = select(results, args.min_accuracy)
+    print_report(results, chosen)
+
+    with open(args.data, 'rb') as fh:
+        data_hash = hashlib.sha256(fh.read()).hexdigest()[:12]
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{data_hash}"
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    report = {
+        "version": version,
+        "data": args.data,
+        "data_sha256_prefix": data_hash,
+        "test_size": args.test_size,
+        "random_state": args.random_state,
+        "min_accuracy": args.min_accuracy,
+        "classes": encoder.classes_.tolist(),
+        "results": results,
+        "chosen": chosen["model"] if chosen else None,
+    }
+
+    if chosen is None:
+        print(f"No model reached accuracy {args.min_accuracy}; no artifact written.")
+    else:
+        model = models[chosen["model"]]
+        artifact = os.path.join(args.output_dir, f"{chosen['model']}-{version}.pkl")
+        pickle.dump(model, open(artifact, 'wb'))
+        report["artifact"] = artifact
+        print(f"Wrote {artifact}")
+
+        if args.export_npz and not isinstance(model, SVC):
+            print(f"Skipping --export-npz: {chosen['model']} is not an SVC")
+        elif args.export_npz:
+            npz = os.path.join(args.output_dir, f"{chosen['model']}-{version}.npz")
+            export_model.export(model, npz)
+            report["npz"] = npz
+            print(f"Wrote {npz}")
+
+    report_path = os.path.join(args.output_dir, f"report-{version}.json")
+    with open(report_path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Wrote {report_path}")
+
+
+if __name__ == '__main__':
+    main()
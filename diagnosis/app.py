@@ -1,35 +1,169 @@
 
-from flask import Flask, jsonify, request
+import json
+
+from flask import Flask, Response, jsonify, request, url_for
 import flask_cors
 
-from lib import ocr,meds,cert,recommendation
+from lib import ocr,meds,cert,recommendation,image_decode,llm
+from lib.image_decode import MAX_REQUEST_BYTES, ImageTooLarge, UnsupportedImage, read_limited
+from lib.jobs import FINISHED, JobStore, JobStoreFull
+from lib.ocr_engine import OCRQueueFull, OCRTimeout
 
 app = Flask(__name__)
 flask_cors.CORS(app)
+app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
+job_store = JobStore()
 
 @app.route("/")
 def hello_world():
     return "<p>Hello, World!</p>"
 
-@app.route("/get_meds_ocr", methods=["POST"])
-def get_meds_ocr():
+@app.errorhandler(ImageTooLarge)
+def image_too_large(e):
+    return jsonify({"error": str(e)}), 413
+
+@app.errorhandler(UnsupportedImage)
+def unsupported_image(e):
+    return jsonify({"error": str(e)}), 415
+
+@app.errorhandler(OCRQueueFull)
+def ocr_queue_full(e):
+    return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+
+@app.errorhandler(OCRTimeout)
+def ocr_timeout(e):
+    return jsonify({"error": str(e)}), 504
+
+@app.errorhandler(JobStoreFull)
+def job_store_full(e):
+    return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+
+def read_image_request():
+    # Returns (image bytes or None, other fields). Besides JSON with a base64
+    # "img", accepts multipart/form-data with an "img" file part plus form
+    # fields, or a raw application/octet-stream body with query-string fields.
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get('img')
+        image_bytes = read_limited(upload.stream) if upload else None
+        return image_bytes, request.form
+    if request.mimetype == "application/octet-stream":
+        return read_limited(request.stream) or None, request.args
     data = request.get_json()
     img_data = data.get('img')
-    text = ocr.do_ocr(img_data)
+    return (ocr.decode_b64(img_data) if img_data else None), data
+
+@app.route("/get_meds_ocr", methods=["POST"])
+def get_meds_ocr():
+    image_bytes, _ = read_image_request()
+    if not image_bytes:
+        return jsonify({"error": "Please provide an image."}), 400
+    text = ocr.do_ocr_bytes(image_bytes)
     
     return meds.post_process_meds(text)
 
+def stream_event(event, data, ndjson):
+    if ndjson:
+        return json.dumps({"event": event, **data}) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/get_meds_ocr/stream", methods=["POST"])
+def get_meds_ocr_stream():
+    # Same input as /get_meds_ocr. Each medicine is sent as a "med" event
+    # once the model has produced it; a repeated index replaces the earlier
+    # entry after a duplicate name was merged. A final "done" event has the
+    # full list. Server-sent events by default, NDJSON with ?format=ndjson.
+    image_bytes, _ = read_image_request()
+    if not image_bytes:
+        return jsonify({"error": "Please provide an image."}), 400
+    text = ocr.do_ocr_bytes(image_bytes)
+    ndjson = request.args.get("format") == "ndjson"
+
+    def events():
+        med_data = {}
+        try:
+            for index, entry in meds.stream_meds(text):
+                med_data[index] = entry
+                yield stream_event("med", {"index": index, "med": entry}, ndjson)
+        except Exception as e:
+            yield stream_event("error", {"error": str(e)}, ndjson)
+            return
+        yield stream_event("done", {"meds": [med_data[index] for index in sorted(med_data)]}, ndjson)
+
+    mimetype = "application/x-ndjson" if ndjson else "text/event-stream"
+    return Response(events(), mimetype=mimetype, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def meds_ocr_job(progress, image_bytes):
+    # count_pages only reads the header: the upload is checked, not decoded.
+    image_decode.count_pages(image_bytes)
+    progress("validated")
+    # A background job waits for an OCR slot instead of failing when busy.
+    text = ocr.do_ocr_bytes(image_bytes, wait=ocr.engine.timeout)
+    progress("ocr_done")
+    med_data = meds.post_process_meds(text)
+    progress("llm_done")
+    return med_data
+
+@app.route("/jobs/meds_ocr", methods=["POST"])
+def submit_meds_ocr_job():
+    # Same input as /get_meds_ocr, but answers 202 with a job id right away.
+    image_bytes, _ = read_image_request()
+    if not image_bytes:
+        return jsonify({"error": "Please provide an image."}), 400
+    job = job_store.submit("meds_ocr", meds_ocr_job, image_bytes, nbytes=len(image_bytes))
+    status_url = url_for("get_job", job_id=job["id"])
+    return jsonify({
+        "job_id": job["id"],
+        "status_url": status_url,
+        "events_url": url_for("job_events", job_id=job["id"]),
+    }), 202, {"Location": status_url}
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    # Server-sent events: one event per stage, named after the stage, with
+    # the job snapshot as data. The stream ends when the job finishes.
+    if job_store.get(job_id) is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+
+    def stream():
+        version, sent = 0, 0
+        while True:
+            job = job_store.wait(job_id, version, timeout=15)
+            if job is None:
+                return
+            if job["version"] == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = job["version"]
+            for stage in job["stages"][sent:]:
+                yield f"event: {stage['stage']}\ndata: {json.dumps(job)}\n\n"
+            sent = len(job["stages"])
+            if job["status"] in FINISHED:
+                return
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route("/verify_cert", methods=["POST"])
 def verify_cert():
-    data = request.get_json()
-    img_data = data.get('img')
+    image_bytes, data = read_image_request()
+    if not image_bytes:
+        return jsonify({"error": "Please provide an image."}), 400
     doc_dob = data.get('dob')
     doc_reg_no = data.get('reg_no')
     doc_name = data.get('name')
-    text = ocr.do_ocr(img_data)
+    text = ocr.do_ocr_bytes(image_bytes)
     doc_cert = cert.post_process_cert(text)
 
-    if doc_cert['name'] == doc_name and doc_cert['dob'] == doc_dob and doc_cert['reg_no'] == doc_reg_no:
+    # Form and query-string fields are always strings, while Cert.reg_no is
+    # an int.
+    if doc_cert['name'] == doc_name and doc_cert['dob'] == doc_dob and str(doc_cert['reg_no']) == str(doc_reg_no):
         return {"verified": True}
     else:
         return {"verified": False}
@@ -48,6 +182,15 @@ def get_recommendation():
     
     return jsonify(response)
 
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({"ocr_cache": ocr.ocr_cache.stats(), "ocr_engine": ocr.engine.stats(), "jobs": job_store.stats(),
+                    "llm_cache": {"meds": meds.response_cache.stats(), "cert": cert.response_cache.stats()},
+                    "llm_in_flight": {"meds": meds.in_flight.stats(), "cert": cert.in_flight.stats()},
+                    "meds_batcher": meds.batcher.stats() if meds.batcher else None,
+                    "rx_parser": dict(meds.parser_stats),
+                    "llm": llm.stats()})
+
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,92 @@
+import argparse
+import base64
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+
+from PIL import ImageDraw
+
+from benchmarks.ocr_backends import synthetic_image
+
+# Concurrent load against a running server. Start it with the fake LLM so no
+# Gemini quota is used, for example:
+#
+#   LLM_PROVIDER=fake LLM_FAKE_LATENCY_MS=800 flask --app app run --port 5000 --with-threads
+#   python -m benchmarks.load_test --endpoint get_meds_ocr --concurrency 16 --requests 200
+#
+# Reports throughput, latency percentiles and status codes.
+#
+# Without --vary every request carries the same image or prompt, so after the
+# first call the OCR, LLM and parser caches answer and the numbers measure
+# cache hits. --vary renders the request index into each image and prompt;
+# alternatively start the server with the caches and the local parser off:
+#
+#   OCR_CACHE_SIZE=0 LLM_CACHE_SIZE=0 RX_PARSER=0 LLM_PROVIDER=fake flask --app app run ...
+
+
+def sample_image_b64(label=None):
+    image = synthetic_image()
+    if label is not None:
+        ImageDraw.Draw(image).text((700, 270), label, fill="black")
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def payloads(endpoint, count, vary):
+    shared_image = None if vary else sample_image_b64()
+    for index in range(count):
+        image = sample_image_b64(f"Ref {index}") if vary else shared_image
+        if endpoint == "get_recommendation":
+            yield {"problem": f"knee pain after a fall {index if vary else ''}".strip()}
+        elif endpoint == "verify_cert":
+            yield {"img": image, "name": "Amoxicillin", "dob": "1990-01-01", "reg_no": 1234}
+        else:
+            yield {"img": image}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Flask API.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--endpoint", default="get_meds_ocr",
+                        choices=["get_meds_ocr", "verify_cert", "get_recommendation"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--vary", action="store_true", help="Make every image and prompt unique (no cache hits).")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    url = f"{args.url}/{args.endpoint}"
+
+    def send(payload):
+        start = time.perf_counter()
+        try:
+            status = session.post(url, json=payload, timeout=args.timeout).status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        return status, (time.perf_counter() - start) * 1e3
+
+    # Rendered up front so image encoding is not part of the timing.
+    requests_to_send = list(payloads(args.endpoint, args.requests, args.vary))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(send, requests_to_send))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"{len(results)} requests to /{args.endpoint} at concurrency {args.concurrency} in {elapsed:.2f}s")
+    print(f"throughput {len(results) / elapsed:.1f} req/s")
+    print(f"latency ms: p50 {statistics.median(latencies):.0f}  "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.0f}  max {latencies[-1]:.0f}")
+    print(f"status codes: {statuses}")
+
+
+if __name__ == "__main__":
+    main()
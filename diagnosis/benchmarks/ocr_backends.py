@@ -0,0 +1,92 @@
+import argparse
+import statistics
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from lib import ocr_backends
+
+# Compares OCR backends on the same images: cold start (first call, which
+# includes loading the language data) and warm per-call latency.
+#
+#   cd diagnosis && python -m benchmarks.ocr_backends prescription1.jpg prescription2.png
+#
+# Without image arguments a synthetic prescription is rendered.
+
+SAMPLE_LINES = [
+    "Rx",
+    "1. Tab Paracetamol 500mg   1-0-1   after food   x 5 days",
+    "2. Cap Amoxicillin 250mg   1-1-1   before food  x 7 days",
+    "3. Syp Cetirizine 5ml      0-0-1   HS",
+]
+
+
+def synthetic_image():
+    image = Image.new("L", (900, 300), "white")
+    draw = ImageDraw.Draw(image)
+    for line, text in enumerate(SAMPLE_LINES):
+        draw.text((30, 30 + line * 50), text, fill="black")
+    return image
+
+
+def load_images(paths):
+    if not paths:
+        return [("synthetic", synthetic_image())]
+    images = []
+    for path in paths:
+        with open(path, "rb") as fh:
+            image = Image.open(BytesIO(fh.read()))
+            image.load()
+        images.append((path, image.convert("L")))
+    return images
+
+
+def bench(backend_name, images, repeat):
+    start = time.perf_counter()
+    backend = ocr_backends.create_backend(backend_name)
+    texts = [backend.image_to_string(images[0][1])]
+    cold = time.perf_counter() - start
+
+    timings = []
+    for _ in range(repeat):
+        for _, image in images:
+            start = time.perf_counter()
+            texts.append(backend.image_to_string(image))
+            timings.append(time.perf_counter() - start)
+    return {
+        "backend": backend.name,
+        "cold_ms": cold * 1e3,
+        "p50_ms": statistics.median(timings) * 1e3,
+        "mean_ms": statistics.fmean(timings) * 1e3,
+        "max_ms": max(timings) * 1e3,
+        "text": texts[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR backends.")
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--backends", default="pytesseract,tesserocr")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    results = []
+    for name in args.backends.split(","):
+        try:
+            results.append(bench(name.strip(), images, args.repeat))
+        except (RuntimeError, ImportError, OSError) as e:
+            print(f"{name}: skipped ({e})")
+
+    print(f"{'backend':>12} {'cold ms':>10} {'p50 ms':>10} {'mean ms':>10} {'max ms':>10}")
+    for result in results:
+        print(f"{result['backend']:>12} {result['cold_ms']:>10.1f} {result['p50_ms']:>10.1f} "
+              f"{result['mean_ms']:>10.1f} {result['max_ms']:>10.1f}")
+    if len(results) > 1:
+        same = all(result["text"].strip() == results[0]["text"].strip() for result in results)
+        print(f"identical text on first image: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import difflib
+import glob
+import os
+import statistics
+import time
+
+from PIL import Image
+
+from benchmarks.ocr_backends import SAMPLE_LINES, synthetic_image
+from lib import ocr_backends, ocr_preprocess
+
+# OCR accuracy against time for preprocessing settings. Fixtures are images
+# with the expected text next to them under the same name:
+#
+#   fixtures/rx1.jpg  fixtures/rx1.txt
+#
+#   cd diagnosis && python -m benchmarks.ocr_preprocess fixtures/
+#
+# Accuracy is the difflib similarity of the whitespace- and case-normalised
+# OCR output to the expected text. Without a fixture directory a synthetic
+# prescription is used, which only shows timings meaningfully.
+
+CONFIGS = {
+    "legacy-2x": dict(scale=2.0, binarize_text=False, deskew=False, crop=False),
+    "auto": dict(binarize_text=False, deskew=False, crop=False),
+    "auto+crop": dict(binarize_text=False, deskew=False, crop=True),
+    "auto+crop+binarize": dict(binarize_text=True, deskew=False, crop=True),
+    "auto+crop+deskew": dict(binarize_text=False, deskew=True, crop=True),
+    "all": dict(binarize_text=True, deskew=True, crop=True),
+}
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def load_fixtures(directory):
+    if directory is None:
+        return [("synthetic", synthetic_image(), "\n".join(SAMPLE_LINES))]
+    fixtures = []
+    for text_path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        stem = os.path.splitext(text_path)[0]
+        images = [path for path in glob.glob(stem + ".*") if path != text_path]
+        if not images:
+            continue
+        with open(text_path, encoding="utf-8") as fh:
+            expected = fh.read()
+        image = Image.open(images[0])
+        image.load()
+        fixtures.append((os.path.basename(images[0]), image, expected))
+    return fixtures
+
+
+def run(config, fixtures, backend):
+    scores, prep_ms, ocr_ms, pixels = [], [], [], []
+    for _, image, expected in fixtures:
+        start = time.perf_counter()
+        prepared = ocr_preprocess.preprocess(image, **config)
+        prepared_at = time.perf_counter()
+        text = backend.image_to_string(prepared)
+        done = time.perf_counter()
+        scores.append(difflib.SequenceMatcher(None, normalize(text), normalize(expected)).ratio())
+        prep_ms.append((prepared_at - start) * 1e3)
+        ocr_ms.append((done - prepared_at) * 1e3)
+        pixels.append(prepared.width * prepared.height / 1e6)
+    return {
+        "accuracy": statistics.fmean(scores),
+        "prep_ms": statistics.fmean(prep_ms),
+        "ocr_ms": statistics.fmean(ocr_ms),
+        "megapixels": statistics.fmean(pixels),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing settings.")
+    parser.add_argument("fixtures", nargs="?")
+    parser.add_argument("--configs", default=",".join(CONFIGS),
+                        help=f"Comma-separated subset of: {', '.join(CONFIGS)}")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error(f"No image/.txt pairs found in {args.fixtures}")
+    backend = ocr_backends.get_backend()
+    print(f"{len(fixtures)} fixture(s), backend {backend.name}")
+
+    print(f"{'config':>20} {'accuracy':>9} {'prep ms':>9} {'ocr ms':>9} {'total ms':>9} {'MP':>6}")
+    for name in args.configs.split(","):
+        result = run(CONFIGS[name.strip()], fixtures, backend)
+        print(f"{name:>20} {result['accuracy']:>9.3f} {result['prep_ms']:>9.1f} {result['ocr_ms']:>9.1f} "
+              f"{result['prep_ms'] + result['ocr_ms']:>9.1f} {result['megapixels']:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+
+from benchmarks.ocr_backends import SAMPLE_LINES
+from lib import meds, rx_parser
+
+# How often the local prescription parser lets /get_meds_ocr skip Gemini,
+# and what that saves. Fixtures are OCR texts, optionally with the expected
+# medicines as JSON next to them:
+#
+#   fixtures/rx1.txt  fixtures/rx1.json
+#
+#   cd diagnosis && python -m benchmarks.rx_parser fixtures/ [--llm]
+#
+# --llm also calls Gemini for every fixture to measure the round trip and
+# to compare against the parser where no .json is given; otherwise
+# --llm-ms is used as the assumed round trip.
+#
+# Before the fixtures, the lines in MUST_USE_LLM are checked: each carries
+# something the parser cannot represent and must never be answered locally.
+
+MUST_USE_LLM = [
+    "Tab Methotrexate 7.5mg 1-0-0 after food only on Sundays",
+    "Tab Prednisolone 10mg 1-0-1 after food x 5 days then 1-0-0 x 5 days",
+    "Tab Ecosprin 75mg 0-1-0 after food alternate days",
+    "Tab Paracetamol 650mg 1-1-1 after food only if fever",
+    "Dolo 650 1-0-1 after food",
+    "Tab Cetirizine 10mg 0-0-1",
+]
+
+
+def load_fixtures(directory):
+    if directory is None:
+        return [("sample", "\n".join(SAMPLE_LINES), None)]
+    fixtures = []
+    for text_path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        with open(text_path, encoding="utf-8") as fh:
+            text = fh.read()
+        expected_path = os.path.splitext(text_path)[0] + ".json"
+        expected = None
+        if os.path.exists(expected_path):
+            with open(expected_path, encoding="utf-8") as fh:
+                expected = json.load(fh)
+        fixtures.append((os.path.basename(text_path), text, expected))
+    return fixtures
+
+
+def check_must_use_llm(min_confidence):
+    failures = 0
+    for line in MUST_USE_LLM:
+        _, confidence = rx_parser.parse(line)
+        if confidence >= min_confidence:
+            failures += 1
+            print(f"Answered locally (confidence {confidence:.2f}), should use the LLM: {line}")
+    print(f"{len(MUST_USE_LLM) - failures}/{len(MUST_USE_LLM)} must-use-LLM lines go to the LLM\n")
+    return failures == 0
+
+
+def signature(med_list):
+    # Order- and case-insensitive comparison of what reminders would be set.
+    return sorted((med["name"].lower(), tuple(sorted(med["Time"])), med["eat"]) for med in med_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local prescription parser.")
+    parser.add_argument("fixtures", nargs="?")
+    parser.add_argument("--min-confidence", type=float, default=meds.RX_PARSER_MIN_CONFIDENCE)
+    parser.add_argument("--llm", action="store_true", help="Call Gemini for every fixture.")
+    parser.add_argument("--llm-ms", type=float, default=2000, help="Assumed LLM round trip without --llm.")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error(f"No .txt fixtures found in {args.fixtures}")
+    if not check_must_use_llm(args.min_confidence):
+        raise SystemExit("The parser answers lines locally that need the LLM")
+
+    avoided, agree, compared, parse_ms, llm_ms = 0, 0, 0, [], []
+    for name, text, expected in fixtures:
+        start = time.perf_counter()
+        parsed, confidence = rx_parser.parse(text)
+        parse_ms.append((time.perf_counter() - start) * 1e3)
+        local = confidence >= args.min_confidence
+
+        if args.llm:
+            start = time.perf_counter()
+            llm_result = json.loads(meds.generate_meds(text))
+            llm_ms.append((time.perf_counter() - start) * 1e3)
+            expected = expected if expected is not None else llm_result
+
+        matches = expected is not None and signature(parsed) == signature(expected)
+        if local:
+            avoided += 1
+            if expected is not None:
+                compared += 1
+                agree += matches
+        print(f"{name:>24}  confidence {confidence:.2f}  {'local' if local else 'llm  '}"
+              + (f"  {'matches' if matches else 'differs'}" if expected is not None else ""))
+
+    llm_round_trip = statistics.fmean(llm_ms) if llm_ms else args.llm_ms
+    rate = avoided / len(fixtures)
+    print(f"\nLLM avoided for {avoided}/{len(fixtures)} prescriptions ({rate:.0%})")
+    if compared:
+        print(f"Parser agrees with expected output on {agree}/{compared} of those")
+    print(f"Parser: mean {statistics.fmean(parse_ms):.3f} ms; LLM round trip: "
+          f"{llm_round_trip:.0f} ms ({'measured' if llm_ms else 'assumed'})")
+    saved = rate * (llm_round_trip - statistics.fmean(parse_ms))
+    print(f"Mean latency saved per prescription: {saved:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
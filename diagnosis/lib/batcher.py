@@ -0,0 +1,101 @@
+import threading
+
+# Collects items submitted within `window_ms` (or until `max_items` arrive)
+# and processes them with one `process_batch(items)` call, which returns one
+# result per item, None for items it could not answer. Those items, and all
+# items of a batch whose call raised, are retried one by one with
+# `process_single(item)`. Callers block in submit() until their result is in.
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.closed = False
+        self.results = None
+        self.errors = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    def __init__(self, process_batch, process_single, max_items=8, window_ms=50):
+        self.process_batch = process_batch
+        self.process_single = process_single
+        self.max_items = max_items
+        self.window = window_ms / 1000
+        self._current = None
+        self._changed = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stats = {"items": 0, "batches": 0, "batch_failures": 0, "single_fallbacks": 0}
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _close(self, batch):
+        # Callers hold self._changed.
+        batch.closed = True
+        if self._current is batch:
+            self._current = None
+        self._changed.notify_all()
+
+    def submit(self, item):
+        with self._changed:
+            batch = self._current
+            leader = batch is None
+            if leader:
+                batch = self._current = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            run_now = len(batch.items) >= self.max_items
+            if run_now:
+                self._close(batch)
+
+        if leader and not run_now:
+            # The first caller waits out the window, then flushes unless a
+            # full batch was already flushed by a later caller.
+            with self._changed:
+                self._changed.wait_for(lambda: batch.closed, timeout=self.window)
+                run_now = not batch.closed
+                if run_now:
+                    self._close(batch)
+        if run_now:
+            self._run(batch)
+
+        batch.done.wait()
+        if batch.errors[index] is not None:
+            raise batch.errors[index]
+        return batch.results[index]
+
+    def _run(self, batch):
+        items = batch.items
+        self._count("items", len(items))
+        self._count("batches")
+        results = [None] * len(items)
+        if len(items) > 1:
+            try:
+                results = list(self.process_batch(items))
+                if len(results) != len(items):
+                    raise ValueError(f"Batch returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                print(f"Batch of {len(items)} failed ({e}), retrying items one by one")
+                self._count("batch_failures")
+                results = [None] * len(items)
+
+        errors = [None] * len(items)
+        for index, result in enumerate(results):
+            if result is not None:
+                continue
+            if len(items) > 1:
+                self._count("single_fallbacks")
+            try:
+                results[index] = self.process_single(items[index])
+            except Exception as e:
+                errors[index] = e
+        batch.results, batch.errors = results, errors
+        batch.done.set()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["items_per_batch"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache:
+    # Thread-safe LRU bounded by entry count, with an optional TTL in seconds
+    # (0 disables expiry).
+
+    def __init__(self, maxsize=256, ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, MISSING)
+            if entry is not MISSING and self.ttl and entry[1] < time.monotonic():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                entry = MISSING
+            if entry is MISSING:
+                self._stats["misses"] += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._data), maxsize=self.maxsize)
+
+
+class DiskCache:
+    # Text values stored one file per key under `directory`, fanned out by the
+    # first two characters of the (hex) key. Writes go through a temp file and
+    # os.replace so concurrent readers never see a partial file.
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return MISSING
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(value)
+        os.replace(tmp_path, path)
+
+
+class TieredCache:
+    # Memory LRU in front of an optional DiskCache; disk hits are promoted.
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self.disk_hits = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is MISSING and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not MISSING:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        return {"memory": self.memory.stats(), "disk_enabled": self.disk is not None, "disk_hits": self.disk_hits}
@@ -1,30 +1,44 @@
 import json
-import os
 from enum import Enum
 
 import google.generativeai as genai
 import typing_extensions as typing
-from dotenv import load_dotenv
 
-load_dotenv()
+from . import llm
+from .llm_cache import LLMCache, cache_key
+from .singleflight import Group
 
-genai.configure(api_key=os.getenv("gemini"))
+PROMPT = "I'll give you an OCR of a certificate, your return json schema will be used to verify with usual input data"
+# Bump when `Cert` or PROMPT change so cached responses are not reused.
+SCHEMA_VERSION = 1
 
-model = genai.GenerativeModel("gemini-1.5-flash")
+response_cache = LLMCache()
+# Concurrent requests for the same text share one Gemini call.
+in_flight = Group()
 
 class Cert(typing.TypedDict):
     name: str
     dob: str
     reg_no: int
 
-def post_process_cert(text: str) -> Cert:
-    result = model.generate_content(
-    ["I'll give you an OCR of a certificate, your return json schema will be used to verify with usual input data",text],
+def request_cert(key, text):
+    result = llm.generate_content(
+    [PROMPT,text],
     generation_config=genai.GenerationConfig(
         response_mime_type="application/json", response_schema=Cert
     ),)
 
     print(result.text)
-    cert_data = json.loads(result.text)
+    json.loads(result.text)  # only cache responses that parse
+    response_cache.set(key, result.text)
+    return result.text
+
+
+def post_process_cert(text: str) -> Cert:
+    key = cache_key(PROMPT, text, SCHEMA_VERSION)
+    response_text = response_cache.get(key)
+    if response_text is None:
+        response_text = in_flight.do(key, lambda: request_cert(key, text))
+    cert_data = json.loads(response_text)
     
     return cert_data
\ No newline at end of file
@@ -0,0 +1,173 @@
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image, UnidentifiedImageError
+
+PDF_ERRORS = ()
+
+try:
+    import pypdfium2 as pdfium
+    PDF_ERRORS += (pdfium.PdfiumError,)
+except ImportError:
+    pdfium = None
+
+try:
+    import pdf2image
+    from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
+    PDF_ERRORS += (PDFPageCountError, PDFSyntaxError)
+except ImportError:
+    pdf2image = None
+
+# Bounded image decoding for uploads. Sizes are checked from the encoded
+# length and the image header before any pixels are decoded, and JPEGs are
+# decoded straight to grayscale at a reduced size with draft(), so the memory
+# one OCR job needs does not depend on what the client sends.
+
+OCR_MAX_UPLOAD_BYTES = int(os.getenv("OCR_MAX_UPLOAD_BYTES", 15 * 1024 * 1024))
+OCR_MAX_IMAGE_PIXELS = int(os.getenv("OCR_MAX_IMAGE_PIXELS", 50_000_000))
+OCR_DECODE_MAX_SIDE = int(os.getenv("OCR_DECODE_MAX_SIDE", 2000))
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", 20))
+OCR_PDF_DPI = int(os.getenv("OCR_PDF_DPI", 200))
+
+# Base64 inflates by 4/3; the rest is room for the other JSON fields.
+MAX_REQUEST_BYTES = OCR_MAX_UPLOAD_BYTES * 4 // 3 + 64 * 1024
+
+# PIL's own decompression-bomb check as a backstop for formats whose header
+# lies about the size.
+Image.MAX_IMAGE_PIXELS = OCR_MAX_IMAGE_PIXELS
+
+# PDFium is not thread-safe, and count_pages runs in request and job threads.
+pdf_lock = threading.Lock()
+
+
+# Modes Image.reduce() accepts; anything else is converted to grayscale first.
+REDUCE_MODES = ("L", "LA", "La", "PA", "I", "F", "RGB", "RGBA", "RGBa", "RGBX", "CMYK", "YCbCr", "LAB", "HSV")
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def check_encoded_size(b64image):
+    if len(b64image) * 3 // 4 > OCR_MAX_UPLOAD_BYTES:
+        raise ImageTooLarge(f"Image is larger than {OCR_MAX_UPLOAD_BYTES} bytes")
+
+
+def read_limited(stream, chunk_size=64 * 1024):
+    # Reads a raw upload stream into one buffer, stopping at the byte cap.
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return bytes(buffer)
+        buffer += chunk
+        if len(buffer) > OCR_MAX_UPLOAD_BYTES:
+            raise ImageTooLarge(f"Image is larger than {OCR_MAX_UPLOAD_BYTES} bytes")
+
+
+def check_pixels(width, height):
+    if width * height > OCR_MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"Image has more than {OCR_MAX_IMAGE_PIXELS} pixels ({width}x{height})")
+
+
+def open_image(image_bytes):
+    # Parses the header only; pixel data is decoded on load().
+    if len(image_bytes) > OCR_MAX_UPLOAD_BYTES:
+        raise ImageTooLarge(f"Image is larger than {OCR_MAX_UPLOAD_BYTES} bytes")
+    try:
+        image = Image.open(BytesIO(image_bytes))
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e)) from e
+    except UnidentifiedImageError as e:
+        raise UnsupportedImage("Upload is not a recognised image format") from e
+    check_pixels(image.width, image.height)
+    return image
+
+
+def is_pdf(image_bytes):
+    return image_bytes[:5] == b"%PDF-"
+
+
+def count_pages(image_bytes):
+    # Pages of a PDF or frames of a multi-page TIFF; 1 for other images.
+    # Raises ImageTooLarge beyond OCR_MAX_PAGES.
+    if is_pdf(image_bytes):
+        if len(image_bytes) > OCR_MAX_UPLOAD_BYTES:
+            raise ImageTooLarge(f"Document is larger than {OCR_MAX_UPLOAD_BYTES} bytes")
+        if pdfium is None and pdf2image is None:
+            raise UnsupportedImage("PDF uploads need the pypdfium2 or pdf2image package")
+        try:
+            with pdf_lock:
+                if pdfium is not None:
+                    # Closed here so PDFium is not touched again outside the lock.
+                    document = pdfium.PdfDocument(image_bytes)
+                    pages = len(document)
+                    document.close()
+                else:
+                    pages = pdf2image.pdfinfo_from_bytes(image_bytes)["Pages"]
+        except PDF_ERRORS as e:
+            raise UnsupportedImage(f"Could not read PDF: {e}") from e
+    else:
+        pages = getattr(open_image(image_bytes), "n_frames", 1)
+    if pages > OCR_MAX_PAGES:
+        raise ImageTooLarge(f"Document has more than {OCR_MAX_PAGES} pages ({pages})")
+    return pages
+
+
+def render_pdf_page(image_bytes, page):
+    scale = OCR_PDF_DPI / 72
+    if pdfium is None and pdf2image is None:
+        raise UnsupportedImage("PDF uploads need the pypdfium2 or pdf2image package")
+    try:
+        with pdf_lock:
+            if pdfium is not None:
+                pdf_page = pdfium.PdfDocument(image_bytes)[page]
+                width, height = pdf_page.get_size()
+                check_pixels(round(width * scale), round(height * scale))
+                image = pdf_page.render(scale=scale, grayscale=True).to_pil()
+            else:
+                image = pdf2image.convert_from_bytes(image_bytes, dpi=OCR_PDF_DPI, first_page=page + 1,
+                                                     last_page=page + 1, grayscale=True)[0]
+                check_pixels(image.width, image.height)
+    except PDF_ERRORS as e:
+        raise UnsupportedImage(f"Could not render PDF page {page + 1}: {e}") from e
+    image.info["dpi"] = (OCR_PDF_DPI, OCR_PDF_DPI)
+    return image
+
+
+def decode_image(image_bytes, max_side=OCR_DECODE_MAX_SIDE, page=0):
+    # Returns a loaded image whose longer side is reduced towards max_side by
+    # integer factors. JPEG is reduced by the decoder itself (1/2, 1/4, 1/8)
+    # and decoded as grayscale; other formats are reduced after decoding.
+    # PDF pages are rendered at OCR_PDF_DPI instead.
+    if is_pdf(image_bytes):
+        return render_pdf_page(image_bytes, page)
+    image = open_image(image_bytes)
+    if page:
+        image.seek(page)
+        check_pixels(image.width, image.height)
+    original_width = image.width
+    if image.format == "JPEG" and max(image.size) > max_side:
+        ratio = max_side / max(image.size)
+        image.draft("L", (round(image.width * ratio), round(image.height * ratio)))
+    image.load()
+    if image.mode.startswith("I;16"):
+        # 16-bit scans: scale down to 8 bits, as convert("L") would clip
+        # everything above 255 to white.
+        image = image.convert("I").point(lambda value: value / 256).convert("L")
+
+    factor = max(image.size) // max_side if max_side else 0
+    if factor >= 2:
+        if image.mode not in REDUCE_MODES:
+            image = image.convert("L")
+        image = image.reduce(factor)
+
+    if image.width != original_width and "dpi" in image.info:
+        ratio = image.width / original_width
+        image.info["dpi"] = tuple(value * ratio for value in image.info["dpi"])
+    return image
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# In-process store for background jobs. A job records its stage transitions
+# (queued, running, then whatever stages the job reports, then done or
+# failed) so clients can poll it or follow it as server-sent events. Finished
+# jobs are dropped JOB_TTL seconds after their last update. Unfinished jobs
+# hold their input (an upload of up to OCR_MAX_UPLOAD_BYTES) in memory, so
+# besides JOB_MAX jobs in total they may hold at most JOB_MAX_BYTES of input.
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_TTL = float(os.getenv("JOB_TTL", 600))
+JOB_MAX = int(os.getenv("JOB_MAX", 1000))
+JOB_MAX_BYTES = int(os.getenv("JOB_MAX_BYTES", 256 * 1024 * 1024))
+
+FINISHED = ("done", "failed")
+
+
+class JobStoreFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind, nbytes=0):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.version = 0
+        self.updated = time.time()
+        self.nbytes = nbytes
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stages[-1]["stage"] if self.stages else None,
+            "stages": list(self.stages),
+            "result": self.result,
+            "error": self.error,
+            "version": self.version,
+        }
+
+
+class JobStore:
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_TTL, max_jobs=JOB_MAX, max_bytes=JOB_MAX_BYTES):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self._held_bytes = 0
+        self._jobs = {}
+        self._changed = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._stats = {"submitted": 0, "done": 0, "failed": 0, "rejected": 0, "expired": 0}
+
+    def _record(self, job, stage, status=None):
+        # Callers hold self._changed.
+        now = time.time()
+        if status is not None:
+            job.status = status
+        job.stages.append({"stage": stage, "at": round(now, 3)})
+        job.version += 1
+        job.updated = now
+        self._changed.notify_all()
+
+    def _expire(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.status in FINISHED and job.updated + self.ttl < now]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._stats["expired"] += len(expired)
+
+    def submit(self, kind, fn, *args, nbytes=0):
+        # fn is called as fn(progress, *args); progress(stage) records a stage.
+        # nbytes is the size of the input held until the job finishes.
+        with self._changed:
+            self._expire()
+            if len(self._jobs) >= self.max_jobs:
+                self._stats["rejected"] += 1
+                raise JobStoreFull(f"Too many jobs ({self.max_jobs}) in the job store")
+            if self._held_bytes + nbytes > self.max_bytes:
+                self._stats["rejected"] += 1
+                raise JobStoreFull(f"Unfinished jobs already hold {self._held_bytes} bytes of input")
+            job = Job(kind, nbytes)
+            self._held_bytes += nbytes
+            self._jobs[job.id] = job
+            self._record(job, "queued")
+            self._stats["submitted"] += 1
+        self._executor.submit(self._run, job, fn, args)
+        return job.snapshot()
+
+    def _run(self, job, fn, args):
+        def progress(stage):
+            with self._changed:
+                self._record(job, stage)
+
+        with self._changed:
+            self._record(job, "running", status="running")
+        try:
+            result = fn(progress, *args)
+        except Exception as e:
+            with self._changed:
+                self._held_bytes -= job.nbytes
+                job.error = {"type": type(e).__name__, "message": str(e)}
+                self._record(job, "failed", status="failed")
+                self._stats["failed"] += 1
+            return
+        with self._changed:
+            self._held_bytes -= job.nbytes
+            job.result = result
+            self._record(job, "done", status="done")
+            self._stats["done"] += 1
+
+    def get(self, job_id):
+        with self._changed:
+            self._expire()
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def wait(self, job_id, version, timeout):
+        # Blocks until the job is newer than `version` or `timeout` passes.
+        # Returns None once the job is gone.
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.version > version:
+                    return job.snapshot() if job else None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job.snapshot()
+                self._changed.wait(remaining)
+
+    def stats(self):
+        with self._changed:
+            stats = dict(self._stats)
+            stats["stored"] = len(self._jobs)
+            stats["held_bytes"] = self._held_bytes
+            stats["running"] = sum(job.status == "running" for job in self._jobs.values())
+            stats["queued"] = sum(job.status == "queued" for job in self._jobs.values())
+        return stats
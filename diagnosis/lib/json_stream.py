@@ -0,0 +1,50 @@
+import json
+
+# Incremental parser for a streamed JSON array of objects, such as a model
+# response arriving in chunks. feed() returns each top-level object as soon
+# as its closing brace has arrived; nothing else is validated until the full
+# text is parsed by the caller.
+
+
+class JSONArrayStream:
+    def __init__(self):
+        self._buffer = ""
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        objects = []
+        position = self._scanned
+        while position < len(self._buffer):
+            char = self._buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+                if char == "{" and self._depth == 2:
+                    self._object_start = position
+            elif char in "]}":
+                if char == "}" and self._depth == 2 and self._object_start is not None:
+                    objects.append(json.loads(self._buffer[self._object_start:position + 1]))
+                    self._object_start = None
+                self._depth -= 1
+            position += 1
+
+        # Keep only what an unfinished object still needs.
+        keep_from = self._object_start if self._object_start is not None else position
+        self._buffer = self._buffer[keep_from:]
+        if self._object_start is not None:
+            self._object_start = 0
+        self._scanned = position - keep_from
+        return objects
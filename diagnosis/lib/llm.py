@@ -0,0 +1,173 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+from google.api_core import exceptions
+
+# One Gemini client for meds, cert and recommendation. It is configured on
+# first use rather than at import time, and every call gets a deadline
+# (LLM_TIMEOUT) and up to LLM_RETRIES retries with jittered exponential
+# backoff on transient errors. With LLM_HEDGE_AFTER > 0, a call that has not
+# answered after that many seconds gets a second, parallel attempt and the
+# first answer wins. First attempts start at once on their own thread, so the
+# hedge delay measures the model, not a queue; hedges run on a pool of
+# LLM_HEDGE_WORKERS threads and are skipped while all of them are busy.
+#
+# LLM_PROVIDER picks the backend: "gemini", or "fake" for the local
+# stand-in in llm_fake used for load testing. A provider is any object with
+# GenerativeModel's generate_content signature.
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", 2))
+LLM_RETRY_BASE = float(os.getenv("LLM_RETRY_BASE", 0.5))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", 0))
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", 8))
+
+RETRYABLE = (
+    exceptions.DeadlineExceeded,
+    exceptions.ServiceUnavailable,
+    exceptions.ResourceExhausted,
+    exceptions.TooManyRequests,
+    exceptions.InternalServerError,
+    TimeoutError,
+    ConnectionError,
+)
+
+_provider = None
+_provider_lock = threading.Lock()
+_hedge_executor = None
+_hedge_slots = threading.BoundedSemaphore(LLM_HEDGE_WORKERS)
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "streams": 0, "attempts": 0, "retries": 0, "failures": 0, "hedges": 0, "hedge_wins": 0,
+          "hedges_skipped": 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def create_provider(name):
+    if name == "gemini":
+        load_dotenv()
+        genai.configure(api_key=os.getenv("gemini"))
+        return genai.GenerativeModel(LLM_MODEL)
+    if name == "fake":
+        from .llm_fake import FakeProvider
+        return FakeProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
+
+
+def get_provider():
+    global _provider, _hedge_executor
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider(LLM_PROVIDER)
+            if LLM_HEDGE_AFTER > 0:
+                _hedge_executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm")
+        return _provider
+
+
+def _attempt(contents, kwargs):
+    _count("attempts")
+    return get_provider().generate_content(contents, request_options={"timeout": LLM_TIMEOUT}, **kwargs)
+
+
+def _attempt_into(future, contents, kwargs):
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(_attempt(contents, kwargs))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+def _hedged(contents, kwargs):
+    # The caller cannot give up on a call it is running itself, so the first
+    # attempt gets its own thread and the caller waits on both attempts.
+    first = Future()
+    threading.Thread(target=_attempt_into, args=(first, contents, kwargs), name="llm-attempt", daemon=True).start()
+    done, _ = wait([first], timeout=LLM_HEDGE_AFTER)
+    if done:
+        return first.result()
+
+    # A busy pool means the provider is already slow for everyone; queueing
+    # more hedges behind it would only add load.
+    if not _hedge_slots.acquire(blocking=False):
+        _count("hedges_skipped")
+        return first.result()
+    _count("hedges")
+    second = _hedge_executor.submit(_attempt, contents, kwargs)
+    second.add_done_callback(lambda _: _hedge_slots.release())
+    pending, error = {first, second}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    _count("hedge_wins")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def generate_content(contents, **kwargs):
+    # Same arguments as GenerativeModel.generate_content, minus
+    # request_options.
+    _count("calls")
+    get_provider()
+    for attempt in range(LLM_RETRIES + 1):
+        try:
+            if _hedge_executor is not None:
+                return _hedged(contents, kwargs)
+            return _attempt(contents, kwargs)
+        except RETRYABLE as e:
+            if attempt == LLM_RETRIES:
+                _count("failures")
+                raise
+            _count("retries")
+            delay = random.uniform(0, LLM_RETRY_BASE * 2 ** attempt)
+            print(f"Gemini call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        except Exception:
+            _count("failures")
+            raise
+
+
+def stream_content(contents, **kwargs):
+    # Yields the response text chunk by chunk. Retries only happen before the
+    # first chunk, and streams are never hedged.
+    _count("streams")
+    provider = get_provider()
+    for attempt in range(LLM_RETRIES + 1):
+        started = False
+        try:
+            _count("attempts")
+            response = provider.generate_content(contents, stream=True,
+                                                 request_options={"timeout": LLM_TIMEOUT}, **kwargs)
+            for chunk in response:
+                started = True
+                yield chunk.text
+            return
+        except RETRYABLE as e:
+            if started or attempt == LLM_RETRIES:
+                _count("failures")
+                raise
+            _count("retries")
+            delay = random.uniform(0, LLM_RETRY_BASE * 2 ** attempt)
+            print(f"Gemini stream failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        except Exception:
+            _count("failures")
+            raise
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats, provider=LLM_PROVIDER)
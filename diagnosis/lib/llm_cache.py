@@ -0,0 +1,47 @@
+import hashlib
+import os
+import threading
+
+from .cache import MISSING, DiskCache, LRUCache, TieredCache
+
+# Raw model responses keyed by prompt, schema version and the OCR text with
+# whitespace and case normalised, so re-scans of the same document skip the
+# LLM round trip. Bump a caller's schema version whenever its prompt output
+# format changes. LLM_CACHE_DIR adds a disk tier that survives restarts.
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 512))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 0))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR")
+
+
+def normalize_text(text):
+    return " ".join(text.lower().split())
+
+
+def cache_key(prompt, text, schema_version):
+    payload = "\x00".join([prompt, str(schema_version), normalize_text(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL, directory=LLM_CACHE_DIR):
+        self.responses = TieredCache(LRUCache(maxsize, ttl), DiskCache(directory) if directory else None)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        response_text = self.responses.get(key)
+        with self._lock:
+            self._stats["misses" if response_text is MISSING else "hits"] += 1
+        return None if response_text is MISSING else response_text
+
+    def set(self, key, response_text):
+        self.responses.set(key, response_text)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["tiers"] = self.responses.stats()
+        return stats
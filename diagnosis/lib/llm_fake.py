@@ -0,0 +1,125 @@
+import enum
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import typing
+
+import typing_extensions
+from google.api_core import exceptions
+
+# Local stand-in for Gemini (LLM_PROVIDER=fake) for load tests that should
+# not spend quota. Responses are built from the response_schema of the call
+# (the med, Cert and batch schemas) or, without a schema, shaped like the
+# doctor recommendation. They are seeded from the prompt, so the same input
+# always yields the same answer. Latency and failures are configurable:
+#
+#   LLM_FAKE_LATENCY_MS=800 LLM_FAKE_LATENCY_DIST=lognormal LLM_FAKE_ERROR_RATE=0.02
+
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", 800))
+LLM_FAKE_LATENCY_DIST = os.getenv("LLM_FAKE_LATENCY_DIST", "lognormal")
+LLM_FAKE_LATENCY_SIGMA = float(os.getenv("LLM_FAKE_LATENCY_SIGMA", 0.5))
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", 0))
+STREAM_CHUNK_CHARS = 32
+
+SPECIALTIES = ["General Physician", "Orthopedic", "Cardiologist", "Dermatologist", "Pediatrician",
+               "Neurologist", "Gastroenterologist", "ENT Specialist", "Pulmonologist"]
+WORDS = ["Paracetamol", "Amoxicillin", "Cetirizine", "Pantoprazole", "Metformin", "Azithromycin",
+         "Ibuprofen", "Omeprazole", "Amlodipine", "Vitamin D3"]
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def sample_latency(rng):
+    mean = LLM_FAKE_LATENCY_MS / 1000
+    if LLM_FAKE_LATENCY_DIST == "fixed":
+        return mean
+    if LLM_FAKE_LATENCY_DIST == "uniform":
+        return rng.uniform(0, 2 * mean)
+    if LLM_FAKE_LATENCY_DIST == "exponential":
+        return rng.expovariate(1 / mean) if mean else 0.0
+    # lognormal with the configured mean
+    sigma = LLM_FAKE_LATENCY_SIGMA
+    return rng.lognormvariate(0, sigma) * mean / math.exp(sigma * sigma / 2)
+
+
+def fake_value(annotation, rng, name="", index=0, ids=None):
+    origin = typing.get_origin(annotation)
+    if origin is list:
+        (item,) = typing.get_args(annotation)
+        hints = typing.get_type_hints(item) if typing_extensions.is_typeddict(item) else {}
+        if "id" in hints and ids:
+            # Batch schemas: one entry per '### <id>' section of the prompt.
+            return [fake_value(item, rng, name, item_id) for item_id in ids]
+        if isinstance(item, type) and issubclass(item, enum.Enum):
+            members = list(item)
+            return [member.value for member in rng.sample(members, rng.randint(1, len(members)))]
+        return [fake_value(item, rng, name, position) for position in range(rng.randint(1, 4))]
+    if typing_extensions.is_typeddict(annotation):
+        return {field: fake_value(hint, rng, field, index, ids)
+                for field, hint in typing.get_type_hints(annotation).items()}
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return rng.choice(list(annotation)).value
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation is int:
+        return index if name == "id" else rng.randint(1000, 999999)
+    if annotation is float:
+        return round(rng.random(), 3)
+    if name == "name":
+        return rng.choice(WORDS)
+    if name == "dob":
+        return f"{rng.randint(1950, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    return f"{name} {rng.randint(1, 99)}".strip()
+
+
+class FakeProvider:
+    name = "fake"
+
+    def generate_content(self, contents, *, generation_config=None, request_options=None, stream=False, **kwargs):
+        prompt = "\n".join(contents) if isinstance(contents, list) else str(contents)
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+        rng = random.Random(seed)
+        # Latency and failures vary per call; the content does not.
+        timing = random.Random()
+
+        latency = sample_latency(timing)
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise exceptions.DeadlineExceeded(f"fake provider took longer than {timeout}s")
+        # Streams get the first chunk after a fifth of the latency and the
+        # rest spread over the remainder.
+        time.sleep(latency / 5 if stream else latency)
+        if timing.random() < LLM_FAKE_ERROR_RATE:
+            raise exceptions.ServiceUnavailable("fake provider error")
+
+        text = self._response_text(prompt, generation_config, rng)
+        if stream:
+            return self._stream(text, latency * 4 / 5)
+        return FakeResponse(text)
+
+    @staticmethod
+    def _stream(text, duration):
+        chunks = [text[start:start + STREAM_CHUNK_CHARS] for start in range(0, len(text), STREAM_CHUNK_CHARS)]
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(duration / max(1, len(chunks) - 1))
+            yield FakeResponse(chunk)
+
+    @staticmethod
+    def _response_text(prompt, generation_config, rng):
+        schema = getattr(generation_config, "response_schema", None)
+        if schema is None and isinstance(generation_config, dict):
+            schema = generation_config.get("response_schema")
+        if schema is None:
+            specialty = rng.choice(SPECIALTIES)
+            return json.dumps({"doctor_type": specialty, "doctors": [f"Dr. {rng.choice(WORDS)}"]})
+        ids = [int(item_id) for item_id in re.findall(r"^### (\d+)$", prompt, re.MULTILINE)]
+        return json.dumps(fake_value(schema, rng, ids=ids))
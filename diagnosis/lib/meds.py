@@ -1,16 +1,40 @@
 import json
 import os
+import threading
 from enum import Enum
 
 import google.generativeai as genai
 import typing_extensions as typing
-from dotenv import load_dotenv
 
-load_dotenv()
+from . import llm, rx_parser
+from .batcher import MicroBatcher
+from .json_stream import JSONArrayStream
+from .llm_cache import LLMCache, cache_key
+from .singleflight import Group
 
-genai.configure(api_key=os.getenv("gemini"))
+PROMPT = "I'll give you an OCR of a medicine prescription, your return json schema will be used to set reminders. Make sure to include any other info in notes"
+# Bump when `med` or PROMPT change so cached responses are not reused.
+SCHEMA_VERSION = 1
 
-model = genai.GenerativeModel("gemini-1.5-flash")
+response_cache = LLMCache()
+# Concurrent requests for the same text share one Gemini call.
+in_flight = Group()
+
+# Prescriptions the local parser reads with at least this confidence skip
+# Gemini entirely. The default 1.0 needs a form, a dose or frequency and the
+# meal timing on every line; anything less would let the parser guess "After".
+# RX_PARSER=0 always uses the LLM.
+RX_PARSER = os.getenv("RX_PARSER", "1") == "1"
+RX_PARSER_MIN_CONFIDENCE = float(os.getenv("RX_PARSER_MIN_CONFIDENCE", 1.0))
+
+parser_stats = {"local": 0, "llm": 0}
+parser_stats_lock = threading.Lock()
+
+# With MEDS_BATCH_WINDOW_MS > 0, prescriptions arriving within that window
+# (up to MEDS_BATCH_SIZE) are extracted with one Gemini call.
+MEDS_BATCH_WINDOW_MS = float(os.getenv("MEDS_BATCH_WINDOW_MS", 0))
+MEDS_BATCH_SIZE = int(os.getenv("MEDS_BATCH_SIZE", 8))
+BATCH_PROMPT = "I'll give you OCRs of several medicine prescriptions, each starting with a line '### <id>'. Return one entry per prescription with its id and its medicines, your return json schema will be used to set reminders. Make sure to include any other info in notes"
 
 class EatTime(Enum):
     BEFORE = "Before"
@@ -29,15 +53,108 @@ class med(typing.TypedDict):
     note: str
 
 
-def post_process_meds(text: str) -> med:
-    result = model.generate_content(
-    ["I'll give you an OCR of a medicine prescription, your return json schema will be used to set reminders. Make sure to include any other info in notes",text],
+class med_batch_item(typing.TypedDict):
+    id: int
+    meds: list[med]
+
+
+def generate_meds(text):
+    result = llm.generate_content(
+    [PROMPT,text],
     generation_config=genai.GenerationConfig(
         response_mime_type="application/json", response_schema=list[med]
     ),)
 
     print(result.text)
-    med_data = json.loads(result.text)
+    json.loads(result.text)  # only cache responses that parse
+    return result.text
+
+
+def generate_meds_batch(texts):
+    # Returns one response text per prescription, None where the model left
+    # an id out (the batcher then retries that one on its own).
+    document = "\n\n".join(f"### {index}\n{text}" for index, text in enumerate(texts))
+    result = llm.generate_content(
+    [BATCH_PROMPT,document],
+    generation_config=genai.GenerationConfig(
+        response_mime_type="application/json", response_schema=list[med_batch_item]
+    ),)
+
+    print(result.text)
+    meds_by_id = {entry['id']: entry['meds'] for entry in json.loads(result.text)}
+    return [json.dumps(meds_by_id[index]) if index in meds_by_id else None for index in range(len(texts))]
+
+
+batcher = MicroBatcher(generate_meds_batch, generate_meds, MEDS_BATCH_SIZE, MEDS_BATCH_WINDOW_MS) \
+    if MEDS_BATCH_WINDOW_MS > 0 else None
+
+
+def request_meds(key, text):
+    response_text = batcher.submit(text) if batcher else generate_meds(text)
+    response_cache.set(key, response_text)
+    return response_text
+
+
+def lookup_meds(text):
+    # Returns (meds or None, cache key): the local parse when it is
+    # confident enough, else a cached model response.
+    if RX_PARSER:
+        med_data, confidence = rx_parser.parse(text)
+        with parser_stats_lock:
+            parser_stats["local" if confidence >= RX_PARSER_MIN_CONFIDENCE else "llm"] += 1
+        if confidence >= RX_PARSER_MIN_CONFIDENCE:
+            return med_data, None
+
+    key = cache_key(PROMPT, text, SCHEMA_VERSION)
+    response_text = response_cache.get(key)
+    return (json.loads(response_text) if response_text is not None else None), key
+
+
+def extract_meds(text):
+    med_data, key = lookup_meds(text)
+    if med_data is not None:
+        return med_data
+    return json.loads(in_flight.do(key, lambda: request_meds(key, text)))
+
+
+def stream_llm_meds(key, text):
+    # Yields each med as soon as the model has streamed it completely, then
+    # caches the full response.
+    parser = JSONArrayStream()
+    chunks = []
+    for chunk in llm.stream_content(
+    [PROMPT,text],
+    generation_config=genai.GenerationConfig(
+        response_mime_type="application/json", response_schema=list[med]
+    ),):
+        chunks.append(chunk)
+        yield from parser.feed(chunk)
+
+    response_text = "".join(chunks)
+    print(response_text)
+    json.loads(response_text)  # only cache responses that parse
+    response_cache.set(key, response_text)
+
+
+def stream_meds(text):
+    # Yields (index, med) with the same name merge as post_process_meds,
+    # applied as meds arrive: an index seen before carries the updated,
+    # merged entry.
+    med_data, key = lookup_meds(text)
+    entries = med_data if med_data is not None else stream_llm_meds(key, text)
+
+    merged_med_data = {}
+    for entry in entries:
+        name = entry['name']
+        if name in merged_med_data:
+            merged_med_data[name]['Time'].extend(entry['Time'])
+        else:
+            merged_med_data[name] = entry
+        yield list(merged_med_data).index(name), merged_med_data[name]
+
+
+def post_process_meds(text: str) -> med:
+    med_data = extract_meds(text)
 
     merged_med_data = {}
     for entry in med_data:
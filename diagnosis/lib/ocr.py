@@ -1,26 +1,59 @@
 import base64
-import os
-from io import BytesIO
 
-import pytesseract
-from PIL import Image, ImageOps
+from . import image_decode, ocr_backends, ocr_preprocess
+from .ocr_cache import OCRCache, content_key
+from .ocr_engine import OCR_TIMEOUT, OCREngine
 
+ocr_cache = OCRCache()
+engine = OCREngine(initializer=ocr_backends.warm_up, recycle_on_timeout=not ocr_backends.stops_at_deadline())
 
-def do_ocr(b64image):
-    image = Image.open(BytesIO(base64.b64decode(b64image)))
-
-    
-    gray_image = ImageOps.grayscale(image)
 
-    scale_factor = 2
-    resized_image = gray_image.resize(
-        (gray_image.width * scale_factor, gray_image.height * scale_factor),
-        resample=Image.LANCZOS
-    )
+def ocr_image_bytes(image_bytes, page=0):
+    # Runs inside an OCR worker process, see ocr_engine.
+    image = image_decode.decode_image(image_bytes, page=page)
+    prepared_image = ocr_preprocess.preprocess(image)
 
-    improved_text = pytesseract.image_to_string(resized_image)
+    # With the pytesseract backend, tesseract is killed after the same
+    # deadline the caller waits for, so a timed-out job frees its worker.
+    # tesserocr cannot be stopped, so the engine recycles the pool instead.
+    improved_text = ocr_backends.get_backend().image_to_string(prepared_image, timeout=OCR_TIMEOUT)
 
     print(improved_text)
 
     return improved_text
-    # resized_image.save('preprocessed_image.jpg')
\ No newline at end of file
+    # prepared_image.save('preprocessed_image.jpg')
+
+
+def decode_b64(b64image):
+    image_decode.check_encoded_size(b64image)
+    return base64.b64decode(b64image)
+
+
+def do_ocr(b64image):
+    return do_ocr_bytes(decode_b64(b64image))
+
+
+def do_ocr_bytes(image_bytes, wait=None):
+    # With `wait`, blocks up to that many seconds for an OCR slot instead of
+    # failing with OCRQueueFull.
+    key = content_key(image_bytes)
+    cached_text = ocr_cache.get(key, len(image_bytes))
+    if cached_text is not None:
+        return cached_text
+
+    # Reject oversize images here, before they take a worker.
+    pages = image_decode.count_pages(image_bytes)
+    if pages > 1 or image_decode.is_pdf(image_bytes):
+        text = "\n\n".join(ocr_pages(image_bytes, pages, wait))
+        ocr_cache.set(key, text)
+        return text
+
+    text = engine.run(ocr_image_bytes, image_bytes, wait=wait)
+    ocr_cache.set(key, text)
+    return text
+
+
+def ocr_pages(image_bytes, pages, wait=None):
+    # Multi-page TIFFs and PDFs: each worker decodes (or renders) and OCRs
+    # one page, in parallel. Texts come back in page order.
+    return engine.run_many(ocr_image_bytes, [(image_bytes, page) for page in range(pages)], wait=wait)
@@ -0,0 +1,96 @@
+import os
+import threading
+
+import pytesseract
+
+# OCR backends behind ocr.do_ocr. "pytesseract" starts a tesseract process
+# per call, which writes the image to a temp file and reloads the language
+# data every time. "tesserocr" keeps a libtesseract engine loaded per thread
+# and passes the PIL image in memory. It needs the optional `tesserocr`
+# package. With OCR_BACKEND=auto (the default) it is used when installed.
+
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+TESSDATA_PREFIX = os.getenv("TESSDATA_PREFIX")
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+class PytesseractBackend:
+    name = "pytesseract"
+
+    def image_to_string(self, image, timeout=0):
+        return pytesseract.image_to_string(image, lang=OCR_LANG, timeout=timeout)
+
+
+class TesserocrBackend:
+    name = "tesserocr"
+
+    def __init__(self):
+        if tesserocr is None:
+            raise RuntimeError("OCR_BACKEND=tesserocr needs the tesserocr package")
+        self._local = threading.local()
+
+    def _api(self):
+        # PyTessBaseAPI is not thread-safe, so each thread owns one engine.
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": OCR_LANG}
+            if TESSDATA_PREFIX:
+                kwargs["path"] = TESSDATA_PREFIX
+            api = self._local.api = tesserocr.PyTessBaseAPI(**kwargs)
+        return api
+
+    def image_to_string(self, image, timeout=0):
+        # libtesseract has no per-call deadline. ocr_engine recycles the
+        # worker pool instead when a caller times out on a running job.
+        api = self._api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name):
+    if name == "auto":
+        if tesserocr is None:
+            return PytesseractBackend()
+        backend = TesserocrBackend()
+        try:
+            backend._api()
+        except RuntimeError as e:
+            # Usually missing language data for OCR_LANG.
+            print(f"tesserocr unavailable ({e}), falling back to pytesseract")
+            return PytesseractBackend()
+        return backend
+    if name == "tesserocr":
+        return TesserocrBackend()
+    if name == "pytesseract":
+        return PytesseractBackend()
+    raise ValueError(f"Unknown OCR_BACKEND: {name}")
+
+
+def stops_at_deadline():
+    # Whether the configured backend ends tesseract itself after `timeout`.
+    # Decided from the settings so the parent process never loads tesserocr.
+    return OCR_BACKEND == "pytesseract" or (OCR_BACKEND == "auto" and tesserocr is None)
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(OCR_BACKEND)
+        return _backend
+
+
+def warm_up():
+    # Pool initializer: load the engine and language data before the first job.
+    backend = get_backend()
+    if isinstance(backend, TesserocrBackend):
+        backend._api()
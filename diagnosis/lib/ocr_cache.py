@@ -0,0 +1,48 @@
+import hashlib
+import os
+import threading
+
+from .cache import MISSING, DiskCache, LRUCache, TieredCache
+
+# OCR results keyed by the SHA-256 of the decoded image bytes, so a re-upload
+# of the same photo skips tesseract. There is deliberately no perceptual
+# (near-duplicate) matching: prescriptions written on the same clinic
+# template hash alike, and a near hit would hand one patient another's text.
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", 256))
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR")
+
+
+def content_key(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class OCRCache:
+    def __init__(self, maxsize=OCR_CACHE_SIZE, directory=OCR_CACHE_DIR):
+        self.results = TieredCache(LRUCache(maxsize), DiskCache(directory) if directory else None)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bytes_saved": 0}
+
+    def _count(self, name, nbytes=0):
+        with self._lock:
+            self._stats[name] += 1
+            self._stats["bytes_saved"] += nbytes
+
+    def get(self, key, nbytes):
+        text = self.results.get(key)
+        if text is MISSING:
+            self._count("misses")
+            return None
+        self._count("hits", nbytes)
+        return text
+
+    def set(self, key, text):
+        self.results.set(key, text)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["tiers"] = self.results.stats()
+        return stats
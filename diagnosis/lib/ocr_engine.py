@@ -0,0 +1,210 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+# Runs OCR jobs in a process pool sized to the cores so tesseract and the
+# PIL preprocessing do not hold the Flask request thread (or the GIL).
+# Submissions beyond OCR_QUEUE_SIZE jobs in flight are rejected instead of
+# piling up, and callers stop waiting after OCR_TIMEOUT seconds. A pool
+# broken by a crashed worker is dropped and rebuilt on the next submission.
+#
+# With recycle_on_timeout (for backends that cannot stop tesseract at the
+# deadline themselves), a job the caller gave up on while it was running
+# retires its pool: new jobs go to a fresh pool, and the old one's workers
+# are terminated once only timed-out jobs are left on it.
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", max(OCR_WORKERS, 1) * 4))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", 60))
+OCR_START_METHOD = os.getenv("OCR_START_METHOD", "spawn")
+
+
+class OCRQueueFull(Exception):
+    pass
+
+
+class OCRTimeout(Exception):
+    pass
+
+
+class OCREngine:
+    def __init__(self, workers=OCR_WORKERS, queue_size=OCR_QUEUE_SIZE, timeout=OCR_TIMEOUT, initializer=None,
+                 recycle_on_timeout=False):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.initializer = initializer
+        self.recycle_on_timeout = recycle_on_timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # Pool of every unfinished future, the futures callers timed out on,
+        # and the worker processes of each retired pool.
+        self._pending = {}
+        self._abandoned = set()
+        self._retired = {}
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "cancelled": 0,
+                       "pool_restarts": 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _get_executor(self):
+        # Created on first use so importing lib.ocr (including inside the
+        # workers themselves) never starts processes.
+        with self._executor_lock:
+            if self._executor is None:
+                context = multiprocessing.get_context(OCR_START_METHOD)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                     initializer=self.initializer)
+            return self._executor
+
+    def _discard_executor(self, executor):
+        # Only the first caller to see a broken pool replaces it.
+        with self._executor_lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        self._count("pool_restarts")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _abandon(self, future):
+        # Called when a caller times out on a job that could not be cancelled.
+        if not self.recycle_on_timeout:
+            return
+        with self._executor_lock:
+            executor = self._pending.get(future)
+            if executor is None:
+                return
+            self._abandoned.add(future)
+            retired = self._executor is executor
+            if retired:
+                self._executor = None
+                # ProcessPoolExecutor has no public way to stop a running
+                # task, and forgets its processes on shutdown().
+                self._retired[executor] = list(executor._processes.values())
+        if retired:
+            self._count("pool_restarts")
+            executor.shutdown(wait=False)
+        self._terminate_if_stuck(executor)
+
+    def _terminate_if_stuck(self, executor):
+        with self._executor_lock:
+            if executor not in self._retired:
+                return
+            futures = {future for future, owner in self._pending.items() if owner is executor}
+            if not futures <= self._abandoned:
+                return
+            # Only jobs nobody waits for are left (or none at all).
+            processes = self._retired.pop(executor)
+            self._abandoned -= futures
+        if not futures:
+            return
+        for process in processes:
+            process.terminate()
+
+    def _release(self, executor, future):
+        with self._executor_lock:
+            self._pending.pop(future, None)
+            self._abandoned.discard(future)
+        self._terminate_if_stuck(executor)
+        self._slots.release()
+        if future.cancelled():
+            self._count("cancelled")
+        elif future.exception() is not None:
+            self._count("failed")
+            if isinstance(future.exception(), BrokenProcessPool):
+                self._discard_executor(executor)
+        else:
+            self._count("completed")
+
+    def submit(self, fn, *args, wait=None):
+        # With `wait`, blocks up to that many seconds for a free slot and
+        # raises OCRTimeout instead of rejecting immediately.
+        acquired = self._slots.acquire(timeout=wait) if wait is not None else self._slots.acquire(blocking=False)
+        if not acquired and wait is not None:
+            self._count("timed_out")
+            raise OCRTimeout(f"No OCR slot became free within {wait}s")
+        if not acquired:
+            self._count("rejected")
+            raise OCRQueueFull(f"OCR queue is full ({self.queue_size} jobs in flight)")
+        executor = None
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+            with self._executor_lock:
+                self._pending[future] = executor
+        except BaseException as e:
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(executor)
+            raise
+        self._count("submitted")
+        future.add_done_callback(partial(self._release, executor))
+        return future
+
+    def run(self, fn, *args, timeout=None, wait=None):
+        # `wait` is passed on to submit(): background jobs wait for a slot
+        # where a request would be rejected.
+        if self.workers <= 0:
+            return fn(*args)
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(fn, *args, wait=wait)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Only queued jobs can be cancelled; a job already running keeps
+            # its slot until the worker-side tesseract timeout stops it, or
+            # until its pool is recycled.
+            if not future.cancel():
+                self._abandon(future)
+            self._count("timed_out")
+            raise OCRTimeout(f"OCR did not finish within {timeout}s")
+
+    def run_many(self, fn, args_list, timeout=None, wait=None):
+        # Runs fn over args_list in parallel and returns results in order.
+        # Only the first job can be rejected as OCRQueueFull (unless `wait`
+        # is given); the rest wait for slots freed by earlier jobs, so a
+        # document larger than the queue still goes through. The deadline is
+        # `timeout` per round of `workers` jobs.
+        if self.workers <= 0:
+            return [fn(*args) for args in args_list]
+        timeout = self.timeout if timeout is None else timeout
+        rounds = -(-len(args_list) // self.workers)
+        deadline = time.monotonic() + timeout * rounds
+        futures = []
+        try:
+            for args in args_list:
+                slot_wait = max(0.0, deadline - time.monotonic()) if futures else wait
+                futures.append(self.submit(fn, *args, wait=slot_wait))
+            return [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeoutError:
+            for future in futures:
+                if not future.cancel():
+                    self._abandon(future)
+            self._count("timed_out")
+            raise OCRTimeout(f"OCR did not finish within {timeout * rounds}s")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["workers"] = self.workers
+        stats["queue_size"] = self.queue_size
+        stats["in_flight"] = stats["submitted"] - stats["completed"] - stats["failed"] - stats["cancelled"]
+        return stats
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
@@ -1,15 +1,9 @@
 import google.generativeai as genai
 import random
 from typing import List, TypedDict
-from dotenv import load_dotenv
-import os
 import json
 
-load_dotenv()
-
-genai.configure(api_key=os.getenv("gemini"))
-
-model = genai.GenerativeModel("gemini-1.5-flash")
+from . import llm
 
 
 class Doctor(TypedDict):
@@ -555,7 +549,7 @@ def generate_prompt(problem: str) -> str:
 
 
 def post_process(text: str):
-    result = model.generate_content(
+    result = llm.generate_content(
         text,
         generation_config=genai.GenerationConfig(
             response_mime_type="application/json"
@@ -0,0 +1,158 @@
+import re
+
+# Rule-based prescription extractor used before the LLM. It reads one
+# medicine per line ("Tab Paracetamol 500mg 1-0-1 after food x 5 days") and
+# understands dose patterns (1-0-1, 1-1-1-1), frequency abbreviations (OD,
+# BD, TDS, QID, HS) and meal timing (AC/PC, before/after food). Output uses
+# the same schema as meds.med; Time and eat hold the meds.Time and
+# meds.EatTime values. Each result comes with a confidence in [0, 1], and
+# meds only skips the LLM when the whole prescription scores high. A line
+# that carries a dose or frequency but cannot be read as a medicine scores 0,
+# so a prescription is never answered locally with a medicine missing. So does
+# a line with text the parser does not understand ("only on Sundays", "then
+# 1-0-0 x 5 days", "SOS"); that text is kept in the note.
+
+MORNING, AFTERNOON, EVENING, NIGHT = "Morning", "Afternoon", "Evening", "Night"
+BEFORE, AFTER = "Before", "After"
+
+FORMS = r"tab|tablet|cap|capsule|syp|syrup|susp|inj|injection|oint|ointment|gel|cream|drops?|lotion|sachet|inh|t|c"
+MED_LINE = re.compile(rf"^\s*(?:\d+\s*[.)]\s*)?(?:(?P<form>{FORMS})\b\.?\s*)(?P<rest>.+)$", re.IGNORECASE)
+NUMBERED_LINE = re.compile(r"^\s*\d+\s*[.)]\s*(?P<rest>[A-Za-z].+)$")
+
+DOSE_SLOTS = r"(?:[0-9]|½|1/2)"
+DOSE_PATTERN = re.compile(rf"\b({DOSE_SLOTS})\s*[-–]\s*({DOSE_SLOTS})\s*[-–]\s*({DOSE_SLOTS})(?:\s*[-–]\s*({DOSE_SLOTS}))?(?![\d/])")
+FREQUENCIES = [
+    (re.compile(r"\b(?:qid|qds|four times a day)\b", re.IGNORECASE), [MORNING, AFTERNOON, EVENING, NIGHT]),
+    (re.compile(r"\b(?:tds|tid|thrice daily|three times a day)\b", re.IGNORECASE), [MORNING, AFTERNOON, NIGHT]),
+    (re.compile(r"\b(?:bd|bid|twice daily|twice a day)\b", re.IGNORECASE), [MORNING, NIGHT]),
+    (re.compile(r"\b(?:hs|at bed ?time|at night)\b", re.IGNORECASE), [NIGHT]),
+    (re.compile(r"\b(?:od|once daily|once a day|in the morning)\b", re.IGNORECASE), [MORNING]),
+]
+MEAL_TIMING = [
+    (re.compile(r"\b(?:ac|a/c|before (?:food|meals?|breakfast|lunch|dinner)|empty stomach)\b", re.IGNORECASE), BEFORE),
+    (re.compile(r"\b(?:pc|p/c|after (?:food|meals?|breakfast|lunch|dinner)|with food)\b", re.IGNORECASE), AFTER),
+]
+DURATION = re.compile(r"(?:\bx\s*|\bfor\s+)?\b(\d+)\s*(days?|weeks?|months?)\b", re.IGNORECASE)
+STRENGTH = re.compile(r"\b\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|units?|%)(?=\W|$)", re.IGNORECASE)
+
+NAME_SCORE, TIME_SCORE, EAT_SCORE = 0.4, 0.4, 0.2
+# Words that may be left over on a line without changing its meaning.
+FILLER_WORDS = {"daily", "po", "orally", "by", "mouth", "with", "water", "tab", "tabs", "tablet", "tablets",
+                "cap", "caps", "capsule", "capsules"}
+
+
+def slots_to_times(slots):
+    # 1-0-1 is morning-afternoon-night; 1-0-0-1 adds evening.
+    names = [MORNING, AFTERNOON, NIGHT] if len(slots) == 3 else [MORNING, AFTERNOON, EVENING, NIGHT]
+    return [name for name, slot in zip(names, slots) if slot not in ("0", None)]
+
+
+def find_times(rest):
+    match = DOSE_PATTERN.search(rest)
+    if match:
+        slots = [slot for slot in match.groups() if slot is not None]
+        return slots_to_times(slots), match.span()
+    for pattern, times in FREQUENCIES:
+        match = pattern.search(rest)
+        if match:
+            return list(times), match.span()
+    return [], None
+
+
+def find_eat(rest):
+    for pattern, eat in MEAL_TIMING:
+        match = pattern.search(rest)
+        if match:
+            return eat, match.span()
+    return None, None
+
+
+def schedule_tokens(rest):
+    # Every dose, frequency and meal-timing token as (span, reading).
+    tokens = []
+    for match in DOSE_PATTERN.finditer(rest):
+        tokens.append((match.span(), slots_to_times([slot for slot in match.groups() if slot is not None])))
+    for pattern, times in FREQUENCIES:
+        tokens.extend((match.span(), list(times)) for match in pattern.finditer(rest))
+    for pattern, eat in MEAL_TIMING:
+        tokens.extend((match.span(), eat) for match in pattern.finditer(rest))
+    return tokens
+
+
+def unread_text(rest, spans):
+    # Whatever is left of the line once the recognised spans are removed.
+    chars = list(rest)
+    for start, end in spans:
+        chars[start:end] = " " * (end - start)
+    text = " ".join("".join(chars).split()).strip(" -,:;.")
+    words = re.findall(r"\w+", text)
+    return text if any(word.lower() not in FILLER_WORDS for word in words) else ""
+
+
+def has_schedule(line):
+    return bool(DOSE_PATTERN.search(line)) or any(pattern.search(line) for pattern, _ in FREQUENCIES)
+
+
+def parse_line(line):
+    # Returns (med dict, confidence) or None when the line is not a medicine.
+    match = MED_LINE.match(line) or NUMBERED_LINE.match(line)
+    if not match:
+        return None
+    has_form = bool(match.groupdict().get("form"))
+    rest = match.group("rest").strip()
+
+    times, times_span = find_times(rest)
+    eat, eat_span = find_eat(rest)
+    duration = DURATION.search(rest)
+
+    # The name runs up to the first dose, frequency or timing token,
+    # keeping the strength ("Paracetamol 500mg").
+    name_end = min([span[0] for span in (times_span, eat_span) if span] + [len(rest)])
+    if duration:
+        name_end = min(name_end, duration.start())
+    name = rest[:name_end].strip(" -,:;")
+    strength = STRENGTH.search(name)
+    if strength:
+        name = name[:strength.end()].strip()
+    if not re.search(r"[A-Za-z]{3,}", name):
+        return None
+
+    # Tokens that repeat the schedule or timing already read ("0-0-1 HS")
+    # are understood; a second, different one ("then 1-0-0") is not.
+    name_start = rest.index(name)
+    spans = [(name_start, name_start + len(name))]
+    spans += [span for span, reading in schedule_tokens(rest) if reading in (times, eat)]
+    if duration:
+        spans.append(duration.span())
+    unread = unread_text(rest, spans)
+
+    notes = []
+    if duration:
+        notes.append(f"{duration.group(1)} {duration.group(2).lower()}")
+    if unread:
+        notes.append(unread)
+    confidence = (NAME_SCORE if has_form else NAME_SCORE / 2) + (TIME_SCORE if times else 0) + (EAT_SCORE if eat else 0)
+    if unread:
+        confidence = 0.0
+    return {
+        "name": name,
+        "Time": times,
+        "eat": eat or AFTER,
+        "note": ", ".join(notes),
+    }, round(confidence, 2)
+
+
+def parse(text):
+    # Returns (list of meds, confidence). Confidence is the lowest line
+    # score, 0 when nothing was recognised.
+    meds, scores = [], []
+    for line in text.splitlines():
+        parsed = parse_line(line)
+        if parsed is None:
+            if has_schedule(line):
+                scores.append(0.0)
+            continue
+        med, score = parsed
+        meds.append(med)
+        scores.append(score)
+    return meds, (min(scores) if scores else 0.0)